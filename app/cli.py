@@ -0,0 +1,238 @@
+# app/cli.py
+"""
+Batch extraction without the HTTP layer.
+
+    python -m app.cli extract-all <dir|manifest.txt> [--concurrency 4]
+
+Streams PDFs from a directory (or a manifest with one path per line),
+runs the same pipeline as `/extract-all`, and persists results through the
+configured output writer. Completed files are appended to a checkpoint so
+an interrupted run resumes where it stopped. Files that already have a
+per-file output (`*_all.json` / `*_all.txt`, for whichever of those
+OUTPUT_FORMATS lists) in the output directory are skipped too; with only
+jsonl/parquet/arrow configured the checkpoint is the sole guard. Each file is keyed by its
+path relative to the source directory (or manifest), so `a/x.pdf` and
+`b/x.pdf` get distinct outputs.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime
+from typing import Iterator, Optional, Set
+
+from app import pipeline
+from app.grobid_client import close_grobid_client
+from app.llmsherpa_client import close_llmsherpa_client
+from app.utils.logger import setup_logger
+from app.utils.output_writer import OUTPUT_DIR, OutputWriter, safe_filename
+from app.utils import profiling
+from app.utils.uploads import SpooledPDF
+
+logger = setup_logger("app.cli")
+
+# formats the writer stores as one `<safe>_<timestamp>_all.<fmt>` file per input
+PER_FILE_FORMATS = ("json", "txt")
+
+
+# ---------------------------------------------------------------------
+# Input discovery
+# ---------------------------------------------------------------------
+def iter_pdfs(source: str, recursive: bool = False) -> Iterator[str]:
+    """Yield PDF paths lazily from a directory or a manifest file."""
+    if os.path.isdir(source):
+        stack = [source]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in sorted(it, key=lambda e: e.name):
+                    if entry.is_dir() and recursive:
+                        stack.append(entry.path)
+                    elif entry.is_file() and entry.name.lower().endswith(".pdf"):
+                        yield entry.path
+    else:
+        base = os.path.dirname(source)
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                path = line.strip()
+                if path and not path.startswith("#"):
+                    yield path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def source_key(path: str, source: str) -> str:
+    """Path of a PDF relative to the source directory / manifest location."""
+    base = source if os.path.isdir(source) else os.path.dirname(os.path.abspath(source))
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(base))
+    if rel.startswith(os.pardir):
+        # manifest entry outside its directory: fall back to the absolute path
+        rel = os.path.abspath(path).lstrip(os.sep)
+    return rel.replace(os.sep, "/")
+
+
+def existing_outputs(output_dir: str, formats: Set[str]) -> Set[str]:
+    """Safe filenames that already have an `*_all.<fmt>` for one of the configured per-file formats."""
+    exts = [f for f in PER_FILE_FORMATS if f in formats]
+    if not exts or not os.path.isdir(output_dir):
+        return set()
+    pattern = re.compile(rf"^(?P<safe>.+)_\d{{8}}_\d{{6}}_all\.(?:{'|'.join(exts)})(?:\.gz|\.zst)?$")
+    done = set()
+    with os.scandir(output_dir) as it:
+        for entry in it:
+            m = pattern.match(entry.name)
+            if m:
+                done.add(m.group("safe"))
+    return done
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["path"])
+            except (ValueError, KeyError):
+                continue  # tolerate a torn last line after a crash
+    return done
+
+
+# ---------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------
+class _Progress:
+    def __init__(self, every: float):
+        self.every = every
+        self.started = self.last = time.monotonic()
+        self.ok = self.failed = self.skipped = 0
+        self.bytes = 0
+
+    def report(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self.last < self.every:
+            return
+        self.last = now
+        elapsed = max(now - self.started, 1e-9)
+        logger.info(
+            f"📈 {self.ok} ok, {self.failed} failed, {self.skipped} skipped | "
+            f"{self.ok / elapsed:.2f} files/s, {self.bytes / elapsed / 1e6:.2f} MB/s"
+        )
+
+
+async def run_extract_all(
+    source: str,
+    output_dir: str = OUTPUT_DIR,
+    concurrency: int = 4,
+    grobid_concurrency: Optional[int] = None,
+    recursive: bool = False,
+    checkpoint_path: Optional[str] = None,
+    tei_mode: str = "none",
+    report_every: float = 10.0,
+    profile: bool = False,
+) -> _Progress:
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = checkpoint_path or os.path.join(output_dir, "cli_checkpoint.jsonl")
+    error_log_path = os.path.join(output_dir, "extract_errors.jsonl")
+    pipeline.configure_grobid_concurrency(grobid_concurrency or concurrency)
+
+    writer = OutputWriter(output_dir=output_dir)
+    done_paths = load_checkpoint(checkpoint_path)
+    done_names = existing_outputs(output_dir, writer.formats)
+    if not writer.formats & set(PER_FILE_FORMATS):
+        logger.warning(
+            f"⚠️ OUTPUT_FORMATS has no json/txt; existing outputs are not detected, "
+            f"only {checkpoint_path} prevents reprocessing"
+        )
+    progress = _Progress(report_every)
+    queue: "asyncio.Queue[Optional[tuple]]" = asyncio.Queue(maxsize=concurrency * 2)
+    session = profiling.new_session(os.path.join(output_dir, "profiles")) if profile else None
+
+    def record(path_: str, line: dict, log_path: str) -> None:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"path": path_, **line, "timestamp": datetime.now().isoformat()}) + "\n")
+
+    async def worker() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            path, filename = item
+            try:
+                pdf = await asyncio.to_thread(SpooledPDF.from_path, path, filename)
+                async with profiling.profile_task(session, filename, "process_file"):
+                    output = await pipeline.extract_all_from_pdf(filename, pdf, tei_mode)
+                # checkpoint only once the result is actually on disk
+                await writer.submit_async(
+                    filename, "all", output,
+                    on_written=lambda p=path, n=filename: record(p, {"filename": n}, checkpoint_path),
+                )
+                progress.ok += 1
+                progress.bytes += pdf.size
+            except Exception as e:
+                logger.exception(f"❌ Error processing {path}: {e}")
+                record(path, {"filename": filename, "error": str(e)}, error_log_path)
+                progress.failed += 1
+            progress.report()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        for path in iter_pdfs(source, recursive):
+            abs_path = os.path.abspath(path)
+            key = source_key(path, source)
+            if abs_path in done_paths or safe_filename(key) in done_names:
+                progress.skipped += 1
+                continue
+            await queue.put((abs_path, key))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.to_thread(writer.close)
+        await close_grobid_client()
+        await close_llmsherpa_client()
+        if session is not None:
+            session.write_summary()
+        progress.report(force=True)
+    return progress
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_all = sub.add_parser("extract-all", help="Run the full pipeline over a directory or manifest of PDFs")
+    p_all.add_argument("source", help="Directory of PDFs or manifest file (one path per line)")
+    p_all.add_argument("--output-dir", default=OUTPUT_DIR)
+    p_all.add_argument("--concurrency", type=int, default=4, help="Files processed in parallel")
+    p_all.add_argument("--grobid-concurrency", type=int, default=None,
+                       help="Concurrent GROBID requests (defaults to --concurrency)")
+    p_all.add_argument("--recursive", action="store_true", help="Descend into subdirectories")
+    p_all.add_argument("--checkpoint", default=None,
+                       help="Checkpoint file (default: <output-dir>/cli_checkpoint.jsonl)")
+    p_all.add_argument("--tei", choices=["full", "ref", "none"], default="none",
+                       help="How TEI is kept in each result (default: none)")
+    p_all.add_argument("--report-every", type=float, default=10.0, help="Seconds between throughput reports")
+    p_all.add_argument("--profile", action="store_true",
+                       help="Profile every file into <output-dir>/profiles/<run id>/")
+
+    args = parser.parse_args(argv)
+    progress = asyncio.run(run_extract_all(
+        args.source,
+        output_dir=args.output_dir,
+        concurrency=args.concurrency,
+        grobid_concurrency=args.grobid_concurrency,
+        recursive=args.recursive,
+        checkpoint_path=args.checkpoint,
+        tei_mode=args.tei,
+        report_every=args.report_every,
+        profile=args.profile,
+    ))
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,212 @@
+"""
+app/extractors/chunker.py
+-------------------------
+Sentence-level, token-bounded chunking of extracted sections, plus batched
+embeddings on the already-loaded MiniLM model (`app.models.MODEL`).
+
+Chunks never cross a (section, subheading) boundary. Sentences are packed
+until `max_tokens` would be exceeded; the next chunk then starts with the
+last `overlap` tokens of the previous one: whole trailing sentences while
+they fit, then the tail of the next sentence cut on token offsets.
+Sentences longer than `max_tokens` are split on token boundaries into
+pieces of at most `max_tokens - overlap` tokens, so consecutive pieces
+overlap too. Partial cuts are moved to the start of a word, so a WordPiece
+word (`incub ##ated`) is never split, and consecutive parts of one sentence
+are emitted as a single slice of it.
+
+`max_tokens` is capped at `MODEL.max_seq_length - 2` ([CLS]/[SEP]): MiniLM
+truncates longer input, so embeddings would silently cover only the start
+of a chunk.
+"""
+
+import base64
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models import MODEL
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "40"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\[])")
+
+# (sentence, token char offsets, first token, end token): tokens [i, j) of a sentence
+_Unit = Tuple[str, Sequence[Tuple[int, int]], int, int]
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+def _section_groups(sections: Dict[str, Any]) -> Iterator[Tuple[str, Optional[str], List[str]]]:
+    """(section, subheading, paragraphs) in reading order."""
+    abstract = sections.get("abstract") or {}
+    if abstract.get("content"):
+        yield "abstract", abstract.get("heading"), abstract["content"]
+
+    methods = sections.get("methods") or {}
+    for subheading, paras in (methods.get("content") or {}).items():
+        yield "methods", subheading, paras
+
+    rd = sections.get("results_discussion") or {}
+    for subsec in rd.get("subsections") or []:
+        yield "results_discussion", subsec.get("subheading"), subsec.get("content") or []
+
+
+def max_chunk_tokens() -> int:
+    """Largest chunk MiniLM embeds without truncation."""
+    return MODEL.max_seq_length - 2
+
+
+def check_chunk_params(max_tokens: int, overlap: int) -> None:
+    """Raise ValueError for a budget the chunker cannot honour."""
+    if max_tokens <= 0 or overlap < 0:
+        raise ValueError("max_tokens must be positive and overlap non-negative")
+    if overlap >= max_tokens:
+        raise ValueError("overlap must be smaller than max_tokens")
+    if max_tokens > max_chunk_tokens():
+        raise ValueError(f"max_tokens must be at most {max_chunk_tokens()} (embedding model input limit)")
+
+
+def chunk_sections(
+    sections: Dict[str, Any],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+) -> List[Dict[str, Any]]:
+    """
+    Turn `extract_structured_sections` output (with `methods` merged in)
+    into chunks: {"chunk_id", "section", "subheading", "text", "n_tokens"}.
+    """
+    check_chunk_params(max_tokens, overlap)
+
+    groups = [
+        (section, subheading, [s for p in paras for s in split_sentences(p)])
+        for section, subheading, paras in _section_groups(sections)
+    ]
+    sentences = [s for _, _, sents in groups for s in sents]
+    if not sentences:
+        return []
+
+    # one tokenizer call for the whole document
+    enc = MODEL.tokenizer(sentences, add_special_tokens=False, return_offsets_mapping=True)
+    lengths = iter(zip(enc["input_ids"], enc["offset_mapping"]))
+
+    chunks: List[Dict[str, Any]] = []
+
+    def emit(section: str, subheading: Optional[str], units: List[_Unit]) -> None:
+        chunks.append({
+            "chunk_id": len(chunks),
+            "section": section,
+            "subheading": subheading,
+            "text": " ".join(_unit_text(u) for u in _merge(units)),
+            "n_tokens": sum(j - i for _, _, i, j in units),
+        })
+
+    piece = max_tokens - overlap
+    for section, subheading, sents in groups:
+        # sentence → units; long sentences in pieces that leave room for the overlap
+        units: List[_Unit] = []
+        for sent in sents:
+            ids, offsets = next(lengths)
+            if len(ids) <= max_tokens:
+                units.append((sent, offsets, 0, len(ids)))
+                continue
+            units.extend((sent, offsets, i, j) for i, j in _pieces(offsets, piece))
+
+        current: List[_Unit] = []
+        n_current = 0
+        for unit in units:
+            n_unit = unit[3] - unit[2]
+            if current and n_current + n_unit > max_tokens:
+                emit(section, subheading, current)
+                current = _tail(current, min(overlap, max_tokens - n_unit))
+                n_current = sum(j - i for _, _, i, j in current)
+            current.append(unit)
+            n_current += n_unit
+        if current:
+            emit(section, subheading, current)
+
+    return chunks
+
+
+def _word_start(offsets: Sequence[Tuple[int, int]], k: int) -> bool:
+    """Token k begins a word (WordPiece continuations abut the previous token)."""
+    return k == 0 or k >= len(offsets) or offsets[k][0] > offsets[k - 1][1]
+
+
+def _pieces(offsets: Sequence[Tuple[int, int]], size: int) -> Iterator[Tuple[int, int]]:
+    """Token ranges of at most `size` tokens, cut at word starts where possible."""
+    i, n = 0, len(offsets)
+    while i < n:
+        end = min(i + size, n)
+        if end < n:
+            # a single word longer than `size` is cut mid-word
+            end = next((k for k in range(end, i, -1) if _word_start(offsets, k)), end)
+        yield i, end
+        i = end
+
+
+def _merge(units: List[_Unit]) -> List[_Unit]:
+    """Join adjacent token ranges of the same sentence into one unit."""
+    merged: List[_Unit] = []
+    for unit in units:
+        if merged and merged[-1][1] is unit[1] and merged[-1][3] == unit[2]:
+            sent, offsets, i, _ = merged[-1]
+            merged[-1] = (sent, offsets, i, unit[3])
+        else:
+            merged.append(unit)
+    return merged
+
+
+def _unit_text(unit: _Unit) -> str:
+    sent, offsets, i, j = unit
+    if i == 0 and j == len(offsets):
+        return sent
+    return sent[offsets[i][0]:offsets[j - 1][1]].strip()
+
+
+def _tail(units: List[_Unit], budget: int) -> List[_Unit]:
+    """Last `budget` tokens of `units`: whole units, then part of the next one."""
+    carry: List[_Unit] = []
+    for sent, offsets, i, j in reversed(units):
+        if budget <= 0:
+            break
+        if j - i <= budget:
+            carry.insert(0, (sent, offsets, i, j))
+            budget -= j - i
+        else:
+            start = j - budget
+            while start < j and not _word_start(offsets, start):
+                start += 1
+            if start < j:
+                carry.insert(0, (sent, offsets, start, j))
+            break
+    return carry
+
+
+def embed_chunks(chunks: List[Dict[str, Any]], batch_size: int = EMBED_BATCH_SIZE) -> np.ndarray:
+    """Normalized float16 embeddings, one row per chunk, in large batches."""
+    if not chunks:
+        return np.zeros((0, MODEL.get_sentence_embedding_dimension()), dtype=np.float16)
+    vectors = MODEL.encode(
+        [c["text"] for c in chunks],
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    return vectors.astype(np.float16)
+
+
+def embeddings_to_base64(vectors: np.ndarray) -> Dict[str, Any]:
+    """Compact JSON form: little-endian float16 matrix, base64 encoded."""
+    data = np.ascontiguousarray(vectors, dtype="<f2")
+    return {
+        "dtype": "float16",
+        "shape": list(data.shape),
+        "data": base64.b64encode(data.tobytes()).decode("ascii"),
+    }
@@ -1,25 +1,32 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple
-from lxml import etree
+from dataclasses import replace
+from typing import Dict, List, Sequence, Tuple
 
-from app.models import ANCHORS, STOPWORDS, METHOD_KEYWORDS, NS
-from app.utils.tei_helpers import _clean, _div_heading, _div_type_hint_okay
-from app.utils.semantic_utils import is_semantic_heading_match
+from app.extractors.section_registry import CORE_REGISTRY, METHODS, SectionSpec, match_sections
+from app.utils.tei_parser import TeiDocument, load_tei
 
 def extract_methods_with_subsections(
-    xml_str: str,
-    sim_threshold: float = 0.65,
-    fallback_threshold: float = 0.5,
+    xml_str: str | bytes | TeiDocument,
+    sim_threshold: float = METHODS.anchor_threshold,
+    fallback_threshold: float = METHODS.keyword_threshold,
+    registry: Sequence[SectionSpec] = CORE_REGISTRY,
 ) -> Tuple[Dict[str, List[str]], float, str | None, int]:
-    try:
-        tree = etree.fromstring(xml_str.encode())
-    except Exception:
+    doc = xml_str if isinstance(xml_str, TeiDocument) else load_tei(xml_str)
+    if doc is None:
         return {}, 0.0, None, -1
 
-    divs = tree.xpath(".//tei:body//tei:div", namespaces=NS)
+    divs = doc.divs
     if not divs:
         return {}, 0.0, None, -1
 
+    # Default thresholds share the document's single registry pass
+    # (`registry` must then include METHODS)
+    if (sim_threshold, fallback_threshold) == (METHODS.anchor_threshold, METHODS.keyword_threshold):
+        m = match_sections(doc, registry)[METHODS.name]
+    else:
+        spec = replace(METHODS, anchor_threshold=sim_threshold, keyword_threshold=fallback_threshold)
+        m = match_sections(doc, (spec,))[METHODS.name]
+
     result: Dict[str, List[str]] = {}
     start_head: str | None = None
     start_score: float = 0.0
@@ -27,9 +34,8 @@ def extract_methods_with_subsections(
 
     # Anchor mode
     for i, d in enumerate(divs):
-        h = _div_heading(d)
-        if h and is_semantic_heading_match(h, ANCHORS, sim_threshold):
-            start_head = h
+        if m.anchor[i]:
+            start_head = d.heading
             start_score = 1.0
             start_idx = i
             break
@@ -39,28 +45,27 @@ def extract_methods_with_subsections(
 
     if start_idx is not None:
         capturing = True
-        for d in divs[start_idx:]:
-            h = _div_heading(d)
-            if h and any(sw in h.lower() for sw in STOPWORDS):
+        for i, d in enumerate(divs[start_idx:], start=start_idx):
+            h = d.heading
+            if m.stop[i]:
                 break
             if h:
                 current_subhead = h
                 result[current_subhead] = []
-            for p in d.xpath(".//tei:p", namespaces=NS):
-                t = _clean("".join(p.itertext()))
-                if t:
-                    result.setdefault(current_subhead or "untitled", []).append(t)
+            for t in d.paragraphs:
+                result.setdefault(current_subhead or "untitled", []).append(t)
 
     else:
+        # Fallback: keyword / div-type hints (m.keyword folds in the type hint)
         for i, d in enumerate(divs):
-            h = _div_heading(d)
-            if not h and not _div_type_hint_okay(d):
+            h = d.heading
+            if not h and not d.type_hint_ok:
                 continue
-            if h and any(sw in h.lower() for sw in STOPWORDS):
+            if m.stop[i]:
                 if capturing:
                     break
                 continue
-            if _div_type_hint_okay(d) or (h and is_semantic_heading_match(h, METHOD_KEYWORDS, fallback_threshold, token_level=True)):
+            if m.keyword[i]:
                 if not capturing:
                     capturing = True
                     if h and not start_head:
@@ -68,10 +73,8 @@ def extract_methods_with_subsections(
                 if h:
                     current_subhead = h
             if capturing:
-                for p in d.xpath(".//tei:p", namespaces=NS):
-                    t = _clean("".join(p.itertext()))
-                    if t:
-                        result.setdefault(current_subhead or "untitled", []).append(t)
+                for t in d.paragraphs:
+                    result.setdefault(current_subhead or "untitled", []).append(t)
 
         if not start_head:
             return {}, 0.0, None, -1
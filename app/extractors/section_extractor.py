@@ -1,99 +1,47 @@
-import re
-from typing import Any, List, Dict
-from lxml import etree
-
-from app.models import (
-    NS,
-    RESULTS_DISCUSSION_ANCHORS,
-    RESULTS_STOPWORDS,
-    DISCUSSION_STOPWORDS,
-    ABSTRACT_ALTERNATES,
+from typing import Any, Dict, Sequence
+
+from app.extractors.section_registry import (
+    ABSTRACT_FALLBACK,
+    CORE_REGISTRY,
+    RESULTS_DISCUSSION,
+    SectionSpec,
+    capture_span,
+    match_sections,
 )
-from app.utils.tei_helpers import _clean, _div_heading
-from app.utils.semantic_utils import is_semantic_heading_match
-
-# — strip leading numbering (e.g. “3.1. Results …” → “Results …”) for matching only
-_LEADING_NUM_RE = re.compile(r"^\s*\d+(?:\.\d+)*[\.\)\:]?\s*")
-def _norm_head(raw: str) -> str:
-    return _LEADING_NUM_RE.sub("", raw).strip()
-
-def extract_structured_sections(xml_str: str) -> Dict[str, Any]:
-    try:
-        tree = etree.fromstring(xml_str.encode())
-    except Exception:
+from app.utils.tei_parser import TeiDocument, load_tei
+
+def extract_structured_sections(
+    xml_str: str | bytes | TeiDocument,
+    registry: Sequence[SectionSpec] = CORE_REGISTRY,
+) -> Dict[str, Any]:
+    doc = xml_str if isinstance(xml_str, TeiDocument) else load_tei(xml_str)
+    if doc is None:
         return {}
 
-    divs = tree.xpath(".//tei:body//tei:div", namespaces=NS)
+    # one heading-match pass, shared with the methods extractor
+    # (`registry` must include ABSTRACT_FALLBACK and RESULTS_DISCUSSION)
+    matches = match_sections(doc, registry)
 
     # ─── Title + Abstract ─────────────────────────────────────────────────────
-    title = _clean(tree.xpath("string(.//tei:titleStmt/tei:title)", namespaces=NS))
-    abstract = [
-        _clean("".join(p.itertext()))
-        for p in tree.xpath(".//tei:abstract//tei:p", namespaces=NS)
-        if _clean("".join(p.itertext()))
-    ]
+    title = doc.title
+    abstract = list(doc.abstract)
     abstract_heading = "abstract"
     if not abstract:
-        for d in divs:
-            raw_h = _div_heading(d)
-            h = _norm_head(raw_h) if raw_h else ""
-            if h and is_semantic_heading_match(h, ABSTRACT_ALTERNATES):
-                abstract = [
-                    _clean("".join(p.itertext()))
-                    for p in d.xpath(".//tei:p", namespaces=NS)
-                    if _clean("".join(p.itertext()))
-                ]
-                abstract_heading = raw_h
+        alt = matches[ABSTRACT_FALLBACK.name]
+        for i, d in enumerate(doc.divs):
+            if alt.anchor[i]:
+                abstract = list(d.paragraphs)
+                abstract_heading = d.heading
                 break
 
     # ─── Unified Results + Discussion ─────────────────────────────────────────
-    def extract_unified_rd() -> Dict[str, Any]:
-        anchors   = RESULTS_DISCUSSION_ANCHORS
-        stopwords = RESULTS_STOPWORDS | DISCUSSION_STOPWORDS
-
-        capturing = False
-        main_heading: str | None = None
-        subsections: List[Dict[str,Any]] = []
-        current = {"subheading": None, "content": []}
-
-        for d in divs:
-            raw_h = _div_heading(d)               # e.g. "3. Results and discussion"
-            h = _norm_head(raw_h) if raw_h else "" # → "Results and discussion"
-
-            # 1) START if we hit any of the anchors
-            if h and not capturing and is_semantic_heading_match(h, anchors, threshold =0.8):
-                capturing = True
-                main_heading = raw_h
-                current = {"subheading": raw_h, "content": []}
-                
-
-            if capturing:
-                # 2) STOP if we hit any stopword
-                if h and is_semantic_heading_match(h, stopwords, token_level=True, threshold = 0.8):
-                    break
-
-                # 3) NEW SUBSECTION if a new head appears
-                if raw_h:
-                    if current["content"]:
-                        subsections.append(current)
-                    current = {"subheading": raw_h, "content": []}
-
-                # 4) COLLECT paragraphs
-                for p in d.xpath(".//tei:p", namespaces=NS):
-                    txt = _clean("".join(p.itertext()))
-                    if txt:
-                        current["content"].append(txt)
-
-        # flush last
-        if capturing and current["content"]:
-            subsections.append(current)
-
-        return {
-            "heading": main_heading or "results_and_discussion",
-            "subsections": subsections
-        }
-
-    rd = extract_unified_rd()
+    main_heading, subsections = capture_span(
+        doc, RESULTS_DISCUSSION, matches[RESULTS_DISCUSSION.name]
+    )
+    rd = {
+        "heading": main_heading or "results_and_discussion",
+        "subsections": subsections
+    }
 
     return {
         "title":    {"heading": "title",    "content": title},
@@ -0,0 +1,228 @@
+"""
+app/extractors/section_registry.py
+----------------------------------
+Declarative section registry and a single-pass heading matcher.
+
+Each `SectionSpec` describes one target section: anchor headings that open
+it, stop headings that close it, optional keyword fallback and div-type
+hint. `match_sections` labels every div for every registered section at
+once: all div headings (and their tokens) are embedded in one batch and
+compared against cached anchor matrices, so adding a section costs one
+extra matrix product instead of another embedding walk over the divs.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models import (
+    ANCHORS,
+    STOPWORDS,
+    METHOD_KEYWORDS,
+    ABSTRACT_ALTERNATES,
+    RESULTS_DISCUSSION_ANCHORS,
+    RESULTS_STOPWORDS,
+    DISCUSSION_STOPWORDS,
+    INTRODUCTION_ANCHORS,
+    RESULTS_ANCHORS,
+    DISCUSSION_ANCHORS,
+    CONCLUSION_ANCHORS,
+    DATA_AVAILABILITY_ANCHORS,
+    SECTION_BOUNDARY_WORDS,
+)
+from app.utils.tei_helpers import _normalize_heading
+from app.utils.tei_parser import TeiDiv, TeiDocument
+from app.utils.semantic_utils import anchor_matrix, encode_normalized, heading_tokens
+
+
+@dataclass(frozen=True)
+class SectionSpec:
+    name: str
+    anchors: FrozenSet[str]
+    anchor_threshold: float = 0.8
+    stopwords: FrozenSet[str] = frozenset()
+    stop_threshold: float = 0.8
+    stop_mode: str = "token"            # "token" (semantic, per word) | "substring"
+    stop_on_anchor: bool = False        # may the anchor div itself also stop?
+    keywords: FrozenSet[str] = frozenset()
+    keyword_threshold: float = 0.5
+    use_type_hint: bool = False         # div @type mentions method/material
+    normalize_heading: bool = True      # strip "3.1." numbering before matching
+
+
+@dataclass
+class SectionMatches:
+    """Per-div booleans for one spec, aligned with `TeiDocument.divs`."""
+    anchor: List[bool] = field(default_factory=list)
+    stop: List[bool] = field(default_factory=list)
+    keyword: List[bool] = field(default_factory=list)
+
+
+def _boundary(*own: set) -> FrozenSet[str]:
+    words = {w for s in own for a in s for w in a.split()}
+    return frozenset(SECTION_BOUNDARY_WORDS - words)
+
+
+# ─── Registry ────────────────────────────────────────────────────────────
+METHODS = SectionSpec(
+    "methods", frozenset(ANCHORS), 0.65,
+    stopwords=frozenset(STOPWORDS), stop_mode="substring",
+    keywords=frozenset(METHOD_KEYWORDS), keyword_threshold=0.5,
+    use_type_hint=True, normalize_heading=False,
+)
+RESULTS_DISCUSSION = SectionSpec(
+    "results_discussion", frozenset(RESULTS_DISCUSSION_ANCHORS), 0.8,
+    stopwords=frozenset(RESULTS_STOPWORDS | DISCUSSION_STOPWORDS), stop_on_anchor=True,
+)
+ABSTRACT_FALLBACK = SectionSpec("abstract", frozenset(ABSTRACT_ALTERNATES), 0.5)
+INTRODUCTION = SectionSpec(
+    "introduction", frozenset(INTRODUCTION_ANCHORS), stopwords=_boundary(INTRODUCTION_ANCHORS)
+)
+RESULTS = SectionSpec(
+    "results", frozenset(RESULTS_ANCHORS), stopwords=_boundary(RESULTS_ANCHORS)
+)
+DISCUSSION = SectionSpec(
+    "discussion", frozenset(DISCUSSION_ANCHORS), stopwords=_boundary(DISCUSSION_ANCHORS)
+)
+CONCLUSION = SectionSpec(
+    "conclusion", frozenset(CONCLUSION_ANCHORS), stopwords=_boundary(CONCLUSION_ANCHORS)
+)
+DATA_AVAILABILITY = SectionSpec(
+    "data_availability", frozenset(DATA_AVAILABILITY_ANCHORS),
+    stopwords=_boundary(DATA_AVAILABILITY_ANCHORS, {"data materials code"}),
+)
+
+# what the methods / structured-section extractors read; they share one pass
+CORE_REGISTRY: Tuple[SectionSpec, ...] = (ABSTRACT_FALLBACK, METHODS, RESULTS_DISCUSSION)
+
+# every registered section, for `extract_registered_sections`
+REGISTRY: Tuple[SectionSpec, ...] = (
+    ABSTRACT_FALLBACK,
+    INTRODUCTION,
+    METHODS,
+    RESULTS_DISCUSSION,
+    RESULTS,
+    DISCUSSION,
+    CONCLUSION,
+    DATA_AVAILABILITY,
+)
+
+
+# ─── Engine ──────────────────────────────────────────────────────────────
+def _headings(divs: List[TeiDiv], spec: SectionSpec) -> List[str]:
+    if spec.normalize_heading:
+        return [_normalize_heading(d.heading) if d.heading else "" for d in divs]
+    return [d.heading or "" for d in divs]
+
+
+def _best(sims: np.ndarray) -> np.ndarray:
+    return sims.max(axis=1) if sims.shape[1] else np.zeros(sims.shape[0])
+
+
+def match_sections(
+    doc: TeiDocument, registry: Sequence[SectionSpec] = REGISTRY
+) -> Dict[str, SectionMatches]:
+    """
+    Label every div for every spec in one pass; cached on the document.
+    Pass only the specs you need: each extra spec adds its anchor (and
+    stop/keyword token) matching to the pass.
+    """
+    key = tuple(registry)
+    cached = doc.match_cache.get(key)
+    if cached is not None:
+        return cached
+
+    divs = doc.divs
+    per_spec = {spec.name: _headings(divs, spec) for spec in registry}
+
+    # Every distinct heading string and heading token, embedded once
+    strings = sorted({h for hs in per_spec.values() for h in hs if h})
+    tokens = sorted({
+        t
+        for spec in registry
+        if spec.keywords or (spec.stopwords and spec.stop_mode == "token")
+        for h in per_spec[spec.name] if h
+        for t in heading_tokens(h)
+    })
+    string_vecs = encode_normalized(strings)
+    token_vecs = encode_normalized(tokens)
+    string_row = {s: i for i, s in enumerate(strings)}
+    token_row = {t: i for i, t in enumerate(tokens)}
+
+    def token_hits(heads: List[str], words: FrozenSet[str], threshold: float) -> List[bool]:
+        best = _best(token_vecs @ anchor_matrix(words).T) if tokens else np.zeros(0)
+        return [
+            bool(h) and any(best[token_row[t]] >= threshold for t in heading_tokens(h))
+            for h in heads
+        ]
+
+    result: Dict[str, SectionMatches] = {}
+    for spec in registry:
+        heads = per_spec[spec.name]
+        best = _best(string_vecs @ anchor_matrix(spec.anchors).T) if strings else np.zeros(0)
+        m = SectionMatches(anchor=[bool(h) and best[string_row[h]] >= spec.anchor_threshold for h in heads])
+
+        if not spec.stopwords:
+            m.stop = [False] * len(divs)
+        elif spec.stop_mode == "substring":
+            m.stop = [bool(h) and any(sw in h.lower() for sw in spec.stopwords) for h in heads]
+        else:
+            m.stop = token_hits(heads, spec.stopwords, spec.stop_threshold)
+
+        if spec.keywords:
+            m.keyword = token_hits(heads, spec.keywords, spec.keyword_threshold)
+        else:
+            m.keyword = [False] * len(divs)
+        if spec.use_type_hint:
+            m.keyword = [k or d.type_hint_ok for k, d in zip(m.keyword, divs)]
+
+        result[spec.name] = m
+
+    doc.match_cache[key] = result
+    return result
+
+
+def capture_span(
+    doc: TeiDocument, spec: SectionSpec, matches: SectionMatches
+) -> Tuple[Optional[str], List[Dict[str, object]]]:
+    """
+    Anchor-to-stop walk: returns (opening heading, subsections), where every
+    headed div inside the span starts a new {"subheading", "content"} block.
+    """
+    capturing = False
+    main_heading: Optional[str] = None
+    subsections: List[Dict[str, object]] = []
+    current: Dict[str, object] = {"subheading": None, "content": []}
+
+    for i, d in enumerate(doc.divs):
+        opened = False
+        if not capturing and matches.anchor[i]:
+            capturing = opened = True
+            main_heading = d.heading
+            current = {"subheading": d.heading, "content": []}
+
+        if capturing:
+            if matches.stop[i] and (spec.stop_on_anchor or not opened):
+                break
+            if d.heading:
+                if current["content"]:
+                    subsections.append(current)
+                current = {"subheading": d.heading, "content": []}
+            current["content"].extend(d.paragraphs)
+
+    if capturing and current["content"]:
+        subsections.append(current)
+    return main_heading, subsections
+
+
+def extract_registered_sections(
+    doc: TeiDocument, registry: Sequence[SectionSpec] = REGISTRY
+) -> Dict[str, Dict[str, object]]:
+    """Every registered section as {"heading", "subsections"}, from one match pass."""
+    matches = match_sections(doc, registry)
+    out = {}
+    for spec in registry:
+        heading, subsections = capture_span(doc, spec, matches[spec.name])
+        out[spec.name] = {"heading": heading or spec.name, "subsections": subsections}
+    return out
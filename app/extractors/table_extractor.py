@@ -3,57 +3,55 @@ app/extractors/table_extractor.py
 ---------------------------------
 Fast, in-memory table extractor that:
 1. Keyword-scans PDF with PyMuPDF   (cheap)
-2. Uses LayoutPDFReader to get page indices
+2. Asks nlm-ingestor (async, pooled, cached) for table page indices
 3. Slices table pages into a tiny PDF
 4. Runs Docling only on that slice
 """
 
-import os
+import asyncio
 import tempfile
 import re
 from typing import List, Dict, Any
 
 import fitz  # PyMuPDF
-from llmsherpa.readers import LayoutPDFReader
 from docling.document_converter import DocumentConverter
 from docling.datamodel.document import TableItem, DoclingDocument
 
-# ---------------------------------------------------------------------
-# End-point configuration
-# ---------------------------------------------------------------------
-LLMSHERPA_URL = os.getenv(
-    "LLMSHERPA_URL",
-    "http://localhost:5010/api/parseDocument?renderFormat=all"
-)
+from app.llmsherpa_client import close_llmsherpa_client, get_table_page_indices_async
+from app.utils.profiling import profile_stage
+from app.utils.uploads import PdfSource, SpooledPDF
 
-_reader = LayoutPDFReader(LLMSHERPA_URL)         # fast layout pass
 _converter = DocumentConverter()  # heavy Docling pass
 
 
 # ---------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------
-def _contains_table_keyword(path: str) -> bool:
-    """Very fast scan for the word 'table' in any page."""
-    doc = fitz.open(path)
-    for page in doc:
-        if re.search(r"\btable\b", page.get_text(), re.IGNORECASE):
-            return True
-    return False
+def _open_pdf(pdf: PdfSource) -> fitz.Document:
+    """Open in-memory PDFs from their bytes and spooled ones by path (no copy)."""
+    if isinstance(pdf, SpooledPDF):
+        pdf.seal()
+        if pdf.path is not None:
+            return fitz.open(pdf.path)
+        pdf = pdf.data
+    return fitz.open(stream=pdf, filetype="pdf")
 
 
-def _get_table_page_indices(path: str) -> List[int]:
-    """LLMSherpa → unique, sorted zero-based page indices with tables."""
-    doc = _reader.read_pdf(path)
-    return sorted({tbl.page_idx for tbl in doc.tables()})
+def _contains_table_keyword(pdf: PdfSource) -> bool:
+    """Very fast scan for the word 'table' in any page."""
+    with _open_pdf(pdf) as doc:
+        for page in doc:
+            if re.search(r"\btable\b", page.get_text(), re.IGNORECASE):
+                return True
+    return False
 
 
-def _slice_pages(src_path: str, page_indices: List[int]) -> bytes:
+def _slice_pages(pdf: PdfSource, page_indices: List[int]) -> bytes:
     """Return a new PDF (bytes) containing only the specified pages."""
     if not page_indices:
         return b""
 
-    src = fitz.open(src_path)
+    src = _open_pdf(pdf)
     dst = fitz.open()               # empty PDF
 
     for idx in page_indices:
@@ -63,49 +61,26 @@ def _slice_pages(src_path: str, page_indices: List[int]) -> bytes:
     return dst.tobytes()            # -> bytes in memory
 
 
-# ---------------------------------------------------------------------
-# Public API
-# ---------------------------------------------------------------------
-def extract_tables_from_bytes(pdf_bytes: bytes) -> List[Dict[str, Any]]:
-    """
-    Rapidly extract tables; skips heavy Docling if none detected.
-    Returns an empty list if no tables exist.
-    """
+def _docling_tables(pdf: PdfSource, table_pages: List[int]) -> List[Dict[str, Any]]:
+    """Slice the table pages and run Docling on them (CPU-bound, blocking)."""
+    # -------------------------------------------------
+    # 1. Slice pages into an in-memory PDF
     # -------------------------------------------------
-    # 1. Write original PDF to a temp file (reader needs path)
+    sliced_pdf_bytes = _slice_pages(pdf, table_pages)
+    if not sliced_pdf_bytes:
+        return []
+
+    # -------------------------------------------------
+    # 2. Run Docling on the tiny slice
+    #    (needs its own temp file for path-based API)
     # -------------------------------------------------
-    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp_orig:
-        tmp_orig.write(pdf_bytes)
-        tmp_orig.flush()
-        orig_path = tmp_orig.name
-
-        # 1a. Cheap keyword filter
-        if not _contains_table_keyword(orig_path):
-            return []
-
-        # 1b. Sherpa layout → page indices
-        table_pages = _get_table_page_indices(orig_path)
-        if not table_pages:
-            return []
-
-        # -------------------------------------------------
-        # 2. Slice pages into an in-memory PDF
-        # -------------------------------------------------
-        sliced_pdf_bytes = _slice_pages(orig_path, table_pages)
-        if not sliced_pdf_bytes:
-            return []
-
-        # -------------------------------------------------
-        # 3. Run Docling on the tiny slice
-        #    (needs its own temp file for path-based API)
-        # -------------------------------------------------
-        with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp_slice:
-            tmp_slice.write(sliced_pdf_bytes)
-            tmp_slice.flush()
-            doc: DoclingDocument = _converter.convert(tmp_slice.name).document
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp_slice:
+        tmp_slice.write(sliced_pdf_bytes)
+        tmp_slice.flush()
+        doc: DoclingDocument = _converter.convert(tmp_slice.name).document
 
     # -------------------------------------------------
-    # 4. Harvest tables → plain dicts
+    # 3. Harvest tables → plain dicts
     # -------------------------------------------------
     tables: List[TableItem] = doc.tables
     result: List[Dict[str, Any]] = []
@@ -139,3 +114,46 @@ def extract_tables_from_bytes(pdf_bytes: bytes) -> List[Dict[str, Any]]:
         )
 
     return result
+
+
+def _docling_stage(pdf: PdfSource, table_pages: List[int]) -> List[Dict[str, Any]]:
+    """Worker-thread entry point; sampled separately when the request is profiled."""
+    with profile_stage("docling_tables", cpu=True):
+        return _docling_tables(pdf, table_pages)
+
+
+# ---------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------
+async def extract_tables_async(pdf: PdfSource) -> List[Dict[str, Any]]:
+    """
+    Rapidly extract tables without blocking the event loop.
+    The keyword scan and Docling run in worker threads, the layout call is
+    awaited; Docling is skipped entirely if no tables are detected.
+    """
+    # 1a. Cheap keyword filter (full-text scan, off the event loop)
+    if not await asyncio.to_thread(_contains_table_keyword, pdf):
+        return []
+
+    # 1b. Sherpa layout → page indices
+    table_pages = await get_table_page_indices_async(pdf)
+    if not table_pages:
+        return []
+
+    return await asyncio.to_thread(_docling_stage, pdf, table_pages)
+
+
+def extract_tables_from_bytes(pdf: PdfSource) -> List[Dict[str, Any]]:
+    """
+    Synchronous wrapper around `extract_tables_async` for callers without
+    a running event loop. Returns an empty list if no tables exist.
+    The pooled LLMSherpa client is bound to the loop `asyncio.run` creates,
+    so it is closed before that loop goes away.
+    """
+    async def _run() -> List[Dict[str, Any]]:
+        try:
+            return await extract_tables_async(pdf)
+        finally:
+            await close_llmsherpa_client()
+
+    return asyncio.run(_run())
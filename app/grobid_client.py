@@ -8,6 +8,7 @@ import backoff
 from httpx import ConnectError, ReadTimeout, HTTPStatusError
 
 from app.models import GROBID_URL
+from app.utils.uploads import PdfSource, pdf_upload_part
 
 logger = logging.getLogger(__name__)
 
@@ -30,25 +31,26 @@ def get_client() -> httpx.AsyncClient:
     max_tries=5,
     jitter=None,
 )
-async def send_to_grobid_async(pdf_bytes: bytes) -> str:
+async def _post_to_grobid(pdf: PdfSource) -> httpx.Response:
     """
-    Send PDF to GROBID and return TEI XML string.
+    Send PDF to GROBID and return the successful response.
     Retries on transient connection issues (e.g., timeout, refused).
     """
     client = get_client()
 
     try:
-        files = {"input": ("file.pdf", pdf_bytes, "application/pdf")}
         headers = {"Accept": "application/xml"}  # GROBID returns XML
 
-        response = await client.post(GROBID_URL, files=files, headers=headers)
+        with pdf_upload_part(pdf) as part:
+            files = {"input": ("file.pdf", part, "application/pdf")}
+            response = await client.post(GROBID_URL, files=files, headers=headers)
 
         if response.status_code == 503:
             logger.warning("⚠️ GROBID overloaded (503). Retry may help.")
             raise RuntimeError("GROBID overloaded (503)")
 
         response.raise_for_status()
-        return response.text
+        return response
 
     except HTTPStatusError as e:
         status = e.response.status_code
@@ -59,6 +61,14 @@ async def send_to_grobid_async(pdf_bytes: bytes) -> str:
         logger.error(f"❌ GROBID request failed: {e}")
         raise
 
+async def send_to_grobid_async(pdf: PdfSource) -> str:
+    """Send PDF to GROBID and return TEI XML string."""
+    return (await _post_to_grobid(pdf)).text
+
+async def send_to_grobid_bytes_async(pdf: PdfSource) -> bytes:
+    """Send PDF to GROBID and return the raw TEI XML bytes (no decoding)."""
+    return (await _post_to_grobid(pdf)).content
+
 async def close_grobid_client():
     """Gracefully close the shared async client (call during app shutdown)."""
     global _client
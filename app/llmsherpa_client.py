@@ -0,0 +1,129 @@
+# app/llmsherpa_client.py
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import httpx
+import backoff
+from httpx import ConnectError, ReadTimeout, HTTPStatusError
+
+from app.utils.uploads import PdfSource, pdf_sha256, pdf_upload_part
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------
+# End-point configuration
+# ---------------------------------------------------------------------
+LLMSHERPA_URL = os.getenv(
+    "LLMSHERPA_URL",
+    "http://localhost:5010/api/parseDocument?renderFormat=all"
+)
+LLMSHERPA_TIMEOUT = float(os.getenv("LLMSHERPA_TIMEOUT", "120"))
+LLMSHERPA_MAX_CONCURRENCY = int(os.getenv("LLMSHERPA_MAX_CONCURRENCY", "2"))
+LLMSHERPA_CACHE_SIZE = int(os.getenv("LLMSHERPA_CACHE_SIZE", "256"))
+
+# Shared async client – will be initialized once
+_client: Optional[httpx.AsyncClient] = None
+
+# Bounds in-flight ingestor calls independently of the GROBID semaphore
+_semaphore: Optional[asyncio.Semaphore] = None
+
+# PDF sha256 → table blocks (LRU, most recently used at the end)
+_layout_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Lazily initialize and return the pooled HTTP client for nlm-ingestor.
+    Connections are kept alive and reused across requests.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=LLMSHERPA_MAX_CONCURRENCY,
+            max_keepalive_connections=LLMSHERPA_MAX_CONCURRENCY,
+        )
+        _client = httpx.AsyncClient(timeout=LLMSHERPA_TIMEOUT, limits=limits)
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLMSHERPA_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _table_blocks(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Keep only the table blocks (page index + rows) from an ingestor response."""
+    blocks = payload.get("return_dict", {}).get("result", {}).get("blocks", [])
+    return [
+        {"page_idx": b.get("page_idx"), "table_rows": b.get("table_rows", [])}
+        for b in blocks
+        if b.get("tag") == "table"
+    ]
+
+
+@backoff.on_exception(
+    backoff.expo,
+    (ConnectError, ReadTimeout),
+    max_tries=3,
+    jitter=None,
+)
+async def _post_pdf(pdf: PdfSource) -> Dict[str, Any]:
+    client = get_client()
+    async with _get_semaphore():
+        with pdf_upload_part(pdf) as part:
+            files = {"file": ("file.pdf", part, "application/pdf")}
+            response = await client.post(LLMSHERPA_URL, files=files)
+    response.raise_for_status()
+    return response.json()
+
+
+async def get_table_blocks_async(pdf: PdfSource) -> List[Dict[str, Any]]:
+    """
+    Send a PDF to nlm-ingestor and return its table blocks.
+    Results are cached by PDF content hash, so repeated uploads skip the call.
+    """
+    key = pdf_sha256(pdf)
+    cached = _layout_cache.get(key)
+    if cached is not None:
+        _layout_cache.move_to_end(key)
+        return cached
+
+    try:
+        payload = await _post_pdf(pdf)
+    except HTTPStatusError as e:
+        status = e.response.status_code
+        logger.error(f"❌ LLMSherpa HTTP error {status}: {e.response.text}")
+        raise
+    except Exception as e:
+        logger.error(f"❌ LLMSherpa request failed: {e}")
+        raise
+
+    tables = _table_blocks(payload)
+    _layout_cache[key] = tables
+    while len(_layout_cache) > LLMSHERPA_CACHE_SIZE:
+        _layout_cache.popitem(last=False)
+    return tables
+
+
+async def get_table_page_indices_async(pdf: PdfSource) -> List[int]:
+    """Unique, sorted zero-based page indices that contain tables."""
+    blocks = await get_table_blocks_async(pdf)
+    return sorted({b["page_idx"] for b in blocks if b.get("page_idx") is not None})
+
+
+async def close_llmsherpa_client():
+    """
+    Gracefully close the shared async client (call during app shutdown).
+    Also drops the semaphore, so the next event loop starts fresh.
+    """
+    global _client, _semaphore
+    if _client and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _semaphore = None
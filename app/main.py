@@ -9,6 +9,12 @@ from app.routes.extract_all import router as extract_all_router
 from app.routes.extract_sections import router as extract_sections_router
 from app.routes.extract_methods import router as extract_methods_router
 from app.routes.extract_tables import router as extract_tables_router  # NEW
+from app.routes.tei import router as tei_router
+from app.routes.chunk import router as chunk_router
+
+from app.grobid_client import close_grobid_client
+from app.llmsherpa_client import close_llmsherpa_client
+from app.utils.output_writer import close_writer, get_writer
 
 # ─── FastAPI instance ────────────────────────────────────────────────
 app = FastAPI(
@@ -39,3 +45,17 @@ app.include_router(extract_all_router)
 app.include_router(extract_sections_router)
 app.include_router(extract_methods_router)
 app.include_router(extract_tables_router)       # NEW
+app.include_router(tei_router)
+app.include_router(chunk_router)
+
+# ─── Startup: build the output writer so bad OUTPUT_* config fails here ─
+@app.on_event("startup")
+async def check_output_config():
+    get_writer()
+
+# ─── Shutdown: release pooled HTTP clients, flush pending output ─────
+@app.on_event("shutdown")
+async def close_shared_resources():
+    await close_grobid_client()
+    await close_llmsherpa_client()
+    close_writer()
@@ -92,6 +92,23 @@ RESULTS_DISCUSSION_ANCHORS = {
     "implications",
 }
 
+# ─────────────────────  Section registry anchor sets  ──────────────────
+# Used by app/extractors/section_registry.py alongside the sets above.
+INTRODUCTION_ANCHORS = {"introduction", "background"}
+RESULTS_ANCHORS = {"results", "experimental results", "findings", "observations", "research results"}
+DISCUSSION_ANCHORS = {"discussion", "interpretation", "implications", "general discussion"}
+CONCLUSION_ANCHORS = {"conclusion", "conclusions", "concluding remarks", "summary and outlook"}
+DATA_AVAILABILITY_ANCHORS = {
+    "data availability", "data availability statement",
+    "availability of data and materials", "code availability",
+}
+# Heading words that end any registered section (minus the section's own words)
+SECTION_BOUNDARY_WORDS = {
+    "introduction", "background", "methods", "materials", "results",
+    "discussion", "conclusion", "conclusions", "references",
+    "acknowledgements", "availability", "funding", "appendix", "supplementary",
+}
+
 # ─────────────────────────────  Shared resources  ──────────────────────
 MODEL = SentenceTransformer("all-MiniLM-L6-v2")
 NS = {"tei": "http://www.tei-c.org/ns/1.0"}
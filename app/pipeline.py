@@ -0,0 +1,104 @@
+# app/pipeline.py
+"""
+Full-document pipeline shared by the `/extract-all` route and the CLI:
+GROBID → methods + structured sections → tables.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, Optional
+
+from app.grobid_client import send_to_grobid_bytes_async
+from app.extractors.methods_extractor import extract_methods_with_subsections
+from app.extractors.section_extractor import extract_structured_sections
+from app.extractors.table_extractor import extract_tables_async
+
+from app.utils.compact import DocumentResult
+from app.utils.logger import setup_logger
+from app.utils.profiling import profile_stage
+from app.utils.tei_parser import TeiDocument, load_tei
+from app.utils.tei_store import TeiMode, tei_fields_async
+from app.utils.uploads import PdfSource
+
+logger = setup_logger(__name__)
+
+# Limit concurrent GROBID requests (1 = sequential processing)
+GROBID_MAX_CONCURRENCY = int(os.getenv("GROBID_MAX_CONCURRENCY", "1"))
+grobid_semaphore = asyncio.Semaphore(GROBID_MAX_CONCURRENCY)
+
+def configure_grobid_concurrency(limit: int) -> None:
+    """Replace the GROBID semaphore (call before any request is in flight)."""
+    global grobid_semaphore
+    grobid_semaphore = asyncio.Semaphore(limit)
+
+async def send_to_grobid_with_retries(pdf: PdfSource, retries=3, delay=10):
+    for attempt in range(retries):
+        try:
+            async with grobid_semaphore:
+                return await send_to_grobid_bytes_async(pdf)
+        except Exception as e:
+            logger.warning(f"Retry {attempt + 1}/{retries} after error: {e}")
+            if attempt < retries - 1:
+                await asyncio.sleep(delay)
+            else:
+                raise
+
+async def fetch_tei(pdf: PdfSource) -> tuple[bytes, Optional[TeiDocument]]:
+    """
+    GROBID → (raw TEI bytes, parsed TeiDocument); raises on empty/non-TEI
+    responses. Malformed XML yields a None document, which the extractors
+    treat as having no sections (the file still gets its tables).
+    """
+    logger.info("🚀 Sending PDF to GROBID...")
+    tei_bytes = await send_to_grobid_with_retries(pdf)
+
+    if not tei_bytes or b"<TEI" not in tei_bytes:
+        logger.warning("⚠️ GROBID returned empty or invalid TEI XML.")
+        raise ValueError("Empty or invalid TEI XML returned.")
+
+    logger.info("✅ GROBID response received")
+    # one streaming parse shared by both extractors
+    with profile_stage("tei_parse"):
+        doc = load_tei(tei_bytes)
+    if doc is None:
+        logger.warning("⚠️ GROBID returned malformed TEI XML; sections will be empty.")
+    return tei_bytes, doc
+
+def extract_sections(doc: Optional[TeiDocument]) -> Dict[str, Any]:
+    """Structured sections with the methods section merged in."""
+    if doc is None:
+        # unparsable TEI: same empty results the extractors give for bad XML
+        methods, score, methods_heading, sections = {}, 0.0, None, {}
+    else:
+        logger.info("🧪 Extracting methods section...")
+        methods, score, methods_heading, _ = extract_methods_with_subsections(doc)
+
+        logger.info("🧬 Extracting structured sections...")
+        sections = extract_structured_sections(doc)
+    sections["methods"] = {
+        "heading": methods_heading or "Methods",
+        "similarity_score": round(score, 3),
+        "content": methods
+    }
+    return sections
+
+async def extract_all_from_pdf(filename: str, pdf: PdfSource, tei_mode: TeiMode = "full") -> DocumentResult:
+    """
+    Run the whole pipeline on one PDF; raises on GROBID failure.
+    Returns a compact result; call `.to_dict()` for the JSON shape.
+    """
+    tei_bytes, doc = await fetch_tei(pdf)
+    with profile_stage("sections"):
+        sections = extract_sections(doc)
+
+    try:
+        logger.info("📊 Extracting tables...")
+        tables = await extract_tables_async(pdf)
+    except Exception as te:
+        logger.warning(f"⚠️ Table extraction failed for {filename}: {te}")
+        tables = []
+
+    # raw TEI stays bytes until the response boundary
+    raw = tei_bytes if tei_mode == "full" else None
+    tei = {} if raw is not None else await tei_fields_async(tei_bytes, tei_mode)
+    return DocumentResult.build(filename, sections, tables, tei, raw)
@@ -0,0 +1,73 @@
+# app/routes/chunk.py
+from fastapi import APIRouter, HTTPException, Request, Query
+from typing import Any, Dict, List, Literal
+import os
+import asyncio
+
+import numpy as np
+
+from app.pipeline import fetch_tei, extract_sections
+from app.extractors.chunker import (
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+    check_chunk_params,
+    chunk_sections,
+    embed_chunks,
+    embeddings_to_base64,
+)
+from app.utils.logger import setup_logger
+from app.utils.output_writer import OUTPUT_DIR, safe_filename
+from app.utils.uploads import PDF_UPLOAD_OPENAPI, iter_pdf_uploads
+
+logger = setup_logger(__name__)
+router = APIRouter(prefix="/chunk", tags=["Chunk"])
+
+EMBEDDINGS_DIR = os.path.join(OUTPUT_DIR, "embeddings")
+
+
+@router.post("/", openapi_extra=PDF_UPLOAD_OPENAPI)
+async def chunk_pdfs(
+    request: Request,
+    max_tokens: int = Query(CHUNK_MAX_TOKENS, gt=0, description="Token budget per chunk"),
+    overlap: int = Query(CHUNK_OVERLAP_TOKENS, ge=0, description="Tokens carried over between chunks"),
+    embeddings: Literal["base64", "npy", "none"] = Query(
+        "base64", description="base64: inline float16 matrix, npy: write .npy under outputs/embeddings, none: skip"
+    ),
+) -> List[Dict[str, Any]]:
+    """
+    Upload PDFs and receive retrieval-ready chunks with section metadata
+    and (optionally) MiniLM embeddings computed in one batch per document.
+    """
+    try:
+        check_chunk_params(max_tokens, overlap)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    responses = []
+
+    async for pdf in iter_pdf_uploads(request):
+        with pdf:
+            filename = pdf.filename
+            try:
+                _, doc = await fetch_tei(pdf)
+                sections = extract_sections(doc)
+                chunks = chunk_sections(sections, max_tokens=max_tokens, overlap=overlap)
+                resp: Dict[str, Any] = {"filename": filename, "chunks": chunks}
+
+                if embeddings != "none":
+                    logger.info(f"🧮 Embedding {len(chunks)} chunks...")
+                    vectors = await asyncio.to_thread(embed_chunks, chunks)
+                    if embeddings == "base64":
+                        resp["embeddings"] = embeddings_to_base64(vectors)
+                    else:
+                        os.makedirs(EMBEDDINGS_DIR, exist_ok=True)
+                        name = f"{safe_filename(filename)}_{pdf.sha256[:16]}.npy"
+                        await asyncio.to_thread(np.save, os.path.join(EMBEDDINGS_DIR, name), vectors)
+                        resp["embeddings_file"] = os.path.join("embeddings", name)
+
+                responses.append(resp)
+            except Exception as e:
+                logger.exception(f"❌ Error chunking {filename}: {e}")
+                responses.append({"filename": filename, "error": str(e)})
+
+    return responses
@@ -1,31 +1,32 @@
-from fastapi import APIRouter, UploadFile, File
-from typing import List
-import os
-from datetime import datetime
+from fastapi import APIRouter, Request, Query
 
-from app.grobid_client import send_to_grobid_async  # ✅ Use async version
+from app.grobid_client import send_to_grobid_bytes_async  # ✅ Use async version
 from app.extractors.methods_extractor import extract_methods_with_subsections
+from app.utils.tei_store import TeiMode, tei_fields_async
+from app.utils.output_writer import get_writer
+from app.utils.uploads import PDF_UPLOAD_OPENAPI, iter_pdf_uploads
 
 router = APIRouter()
 
-@router.post("/extract-methods")
-async def extract_methods_api(files: List[UploadFile] = File(...)):
+@router.post("/extract-methods", openapi_extra=PDF_UPLOAD_OPENAPI)
+async def extract_methods_api(
+    request: Request,
+    tei: TeiMode = Query("full", description="full: embed TEI XML, ref: return a /tei/{hash} reference, none: omit"),
+):
     responses = []
-    output_dir = os.path.join(os.path.dirname(__file__), "..", "outputs")
-    os.makedirs(output_dir, exist_ok=True)
 
-    for up in files:
-        pdf_bytes = await up.read()
-        xml_str = await send_to_grobid_async(pdf_bytes)  # ✅ Await the async GROBID call
+    async for pdf in iter_pdf_uploads(request):
+        with pdf:
+            tei_bytes = await send_to_grobid_bytes_async(pdf)  # ✅ Await the async GROBID call
 
-        if not xml_str:
-            responses.append({"filename": up.filename, "error": "Failed to parse with GROBID"})
+        if not tei_bytes:
+            responses.append({"filename": pdf.filename, "error": "Failed to parse with GROBID"})
             continue
 
-        methods, score, matched_heading, fallback_heads = extract_methods_with_subsections(xml_str)
+        methods, score, matched_heading, fallback_heads = extract_methods_with_subsections(tei_bytes)
         resp = {
-            "filename": up.filename,
-            "tei_xml": xml_str,
+            "filename": pdf.filename,
+            **(await tei_fields_async(tei_bytes, tei)),
             "matched_section": matched_heading,
             "similarity_score": round(score, 3),
             "fallback_subsections": fallback_heads
@@ -33,12 +34,10 @@ async def extract_methods_api(files: List[UploadFile] = File(...)):
 
         if methods:
             methods_text = "\n\n".join(methods)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename_safe = up.filename.replace(" ", "_").replace("/", "_")
-            save_path = os.path.join(output_dir, f"{filename_safe}_{timestamp}_methods.txt")
-            with open(save_path, "w", encoding="utf-8") as f:
-                f.write(methods_text)
             resp["methods_section"] = methods_text
+            # persist results only; the TEI is served by the response / TEI store
+            record = {k: v for k, v in resp.items() if not k.startswith("tei_")}
+            await get_writer().submit_async(pdf.filename, "methods", record)
         else:
             resp["error"] = "No valid Methods section found."
 
@@ -1,50 +1,34 @@
-from fastapi import APIRouter, UploadFile, File
-from typing import List
-import os
-import json
-from datetime import datetime
+from fastapi import APIRouter, Request, Query
 
-from app.grobid_client import send_to_grobid_async  # ✅ Updated import
+from app.grobid_client import send_to_grobid_bytes_async  # ✅ Updated import
 from app.extractors.section_extractor import extract_structured_sections
+from app.utils.tei_store import TeiMode, tei_fields_async
+from app.utils.output_writer import get_writer
+from app.utils.uploads import PDF_UPLOAD_OPENAPI, iter_pdf_uploads
 
 router = APIRouter()
 
-@router.post("/extract-sections")
-async def extract_sections_api(files: List[UploadFile] = File(...)):
+@router.post("/extract-sections", openapi_extra=PDF_UPLOAD_OPENAPI)
+async def extract_sections_api(
+    request: Request,
+    tei: TeiMode = Query("full", description="full: embed TEI XML, ref: return a /tei/{hash} reference, none: omit"),
+):
     responses = []
-    output_dir = os.path.join(os.path.dirname(__file__), "..", "outputs")
-    os.makedirs(output_dir, exist_ok=True)
 
-    for up in files:
-        pdf_bytes = await up.read()
-        xml_str = await send_to_grobid_async(pdf_bytes)  # ✅ Await async GROBID
+    async for pdf in iter_pdf_uploads(request):
+        with pdf:
+            tei_bytes = await send_to_grobid_bytes_async(pdf)  # ✅ Await async GROBID
 
-        if not xml_str:
-            responses.append({"filename": up.filename, "error": "Failed to parse with GROBID"})
+        if not tei_bytes:
+            responses.append({"filename": pdf.filename, "error": "Failed to parse with GROBID"})
             continue
 
-        sections = extract_structured_sections(xml_str)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename_safe = up.filename.replace(" ", "_").replace("/", "_")
-        save_path = os.path.join(output_dir, f"{filename_safe}_{timestamp}_sections.json")
-
-        with open(save_path, "w", encoding="utf-8") as f:
-            json.dump(sections, f, indent=2, ensure_ascii=False)
-
-        txt_path = os.path.join(output_dir, f"{filename_safe}_{timestamp}_sections.txt")
-        with open(txt_path, "w", encoding="utf-8") as f:
-            for key, sec in sections.items():
-                f.write(f"### {sec.get('heading', key).upper()}\n")
-                content = sec.get("content", [])
-                if isinstance(content, list):
-                    for para in content:
-                        f.write(para + "\n\n")
-                elif isinstance(content, str):
-                    f.write(content + "\n\n")
+        sections = extract_structured_sections(tei_bytes)
+        await get_writer().submit_async(pdf.filename, "sections", sections)
 
         responses.append({
-            "filename": up.filename,
-            "tei_xml": xml_str,
+            "filename": pdf.filename,
+            **(await tei_fields_async(tei_bytes, tei)),
             "extracted_sections": sections
         })
 
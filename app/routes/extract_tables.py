@@ -1,48 +1,35 @@
 # app/routes/extract_tables.py
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, Request, Response
 from typing import List, Dict, Any
-import os, json
-from datetime import datetime
 
-
-from app.extractors.table_extractor import extract_tables_from_bytes
+from app.extractors.table_extractor import extract_tables_async
+from app.utils.output_writer import get_writer
+from app.utils.profiling import profile_task, start_session
+from app.utils.uploads import PDF_UPLOAD_OPENAPI, iter_pdf_uploads
 
 router = APIRouter(prefix="/extract-tables", tags=["Extract Tables"])
 
 
-@router.post("/")
-async def extract_tables(files: List[UploadFile] = File(...)) -> List[Dict[str, Any]]:
+@router.post("/", openapi_extra=PDF_UPLOAD_OPENAPI)
+async def extract_tables(request: Request, response: Response) -> List[Dict[str, Any]]:
     """
     Upload one or more PDFs and receive their tables.
     The heavy Docling pass is skipped entirely for PDFs without tables.
     """
+    profile = start_session(request)  # opt-in, see app/utils/profiling.py
     responses = []
-    output_dir = os.path.join(os.path.dirname(__file__), "..", "outputs")
-    os.makedirs(output_dir, exist_ok=True)
 
-    for up in files:
-        pdf_bytes = await up.read()
-        tables = extract_tables_from_bytes(pdf_bytes)  # <-- uses new logic
+    async for pdf in iter_pdf_uploads(request):
+        with pdf:
+            async with profile_task(profile, pdf.filename, "tables"):
+                tables = await extract_tables_async(pdf)  # <-- uses new logic
 
         # Persist results (optional; mirrors other routes)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_name = up.filename.replace(" ", "_").replace("/", "_")
-
-        json_path = os.path.join(output_dir, f"{safe_name}_{timestamp}_tables.json")
-        with open(json_path, "w", encoding="utf-8") as fp:
-            json.dump(tables, fp, indent=2, ensure_ascii=False)
-
-        txt_path = os.path.join(output_dir, f"{safe_name}_{timestamp}_tables.txt")
-        with open(txt_path, "w", encoding="utf-8") as fp:
-            for tbl in tables:
-                caption = tbl.get("caption") or ""
-                fp.write(f"### TABLE {tbl['table_index']}: {caption}\n")
-                for row in tbl["rows"]:
-                    fp.write(" | ".join(row) + "\n")
-                if tbl.get("footnotes"):
-                    fp.write("\n*Footnotes:* " + " ".join(tbl["footnotes"]) + "\n")
-                fp.write("\n")
-
-        responses.append({"filename": up.filename, "tables": tables})
+        await get_writer().submit_async(pdf.filename, "tables", tables)
+
+        responses.append({"filename": pdf.filename, "tables": tables})
 
+    if profile is not None:
+        profile.write_summary()
+        response.headers["X-Profile-Id"] = profile.profile_id
     return responses
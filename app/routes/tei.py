@@ -0,0 +1,15 @@
+# app/routes/tei.py
+from fastapi import APIRouter, HTTPException, Response
+
+from app.utils.tei_store import get_tei
+
+router = APIRouter(prefix="/tei", tags=["TEI"])
+
+
+@router.get("/{tei_hash}")
+async def fetch_tei(tei_hash: str) -> Response:
+    """Return a TEI blob previously referenced by an extract route (`tei=ref`)."""
+    data = get_tei(tei_hash)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Unknown TEI reference")
+    return Response(content=data, media_type="application/xml")
@@ -0,0 +1,290 @@
+"""
+app/utils/columnar_export.py
+----------------------------
+Bulk export of extraction results into columnar datasets for corpus runs.
+
+Two datasets are appended to as a series of rolling part files:
+  paragraphs   filename, section, subheading, paragraph_index, text
+  table_cells  filename, table_index, caption, row, col, text
+
+Rows are buffered and written one row group at a time. A part file is
+written as a hidden `.part-*.tmp` (ignored by dataset readers) and renamed
+to `part-*.{parquet,arrow}` once its footer is written: after
+COLUMNAR_PART_ROW_GROUPS row groups, once it exceeds COLUMNAR_PART_MAX_BYTES,
+or on `flush()`. A crash therefore loses at most the open part, and every
+renamed part is readable right away.
+
+Repeated strings (filename, section, subheading, caption) are
+dictionary-encoded: per row group for Parquet, against one growing
+per-part dictionary for Arrow IPC so the file stays memory-mappable.
+Requires `pyarrow`.
+
+Backfill existing per-file outputs with:
+    python -m app.utils.columnar_export app/outputs app/outputs/datasets
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_ROW_GROUP_SIZE = int(os.getenv("COLUMNAR_ROW_GROUP_SIZE", "16384"))
+COLUMNAR_PART_ROW_GROUPS = int(os.getenv("COLUMNAR_PART_ROW_GROUPS", "8"))
+COLUMNAR_PART_MAX_BYTES = int(os.getenv("COLUMNAR_PART_MAX_BYTES", str(256 * 1024 * 1024)))
+
+PARAGRAPH_COLUMNS = ("filename", "section", "subheading", "paragraph_index", "text")
+TABLE_CELL_COLUMNS = ("filename", "table_index", "caption", "row", "col", "text")
+_DICT_COLUMNS = {"filename", "section", "subheading", "caption"}
+_INT_COLUMNS = {"paragraph_index", "table_index", "row", "col"}
+
+
+# ---------------------------------------------------------------------
+# Record flattening
+# ---------------------------------------------------------------------
+def paragraph_rows(filename: str, sections: Dict[str, Any]) -> Iterator[Tuple]:
+    """One row per paragraph of the abstract, methods and results/discussion."""
+    abstract = sections.get("abstract") or {}
+    for i, text in enumerate(abstract.get("content") or []):
+        yield filename, "abstract", abstract.get("heading"), i, text
+
+    methods = sections.get("methods") or {}
+    for subheading, paras in (methods.get("content") or {}).items():
+        for i, text in enumerate(paras):
+            yield filename, "methods", subheading, i, text
+
+    rd = sections.get("results_discussion") or {}
+    for subsec in rd.get("subsections") or []:
+        for i, text in enumerate(subsec.get("content") or []):
+            yield filename, "results_discussion", subsec.get("subheading"), i, text
+
+
+def table_cell_rows(filename: str, tables: List[Dict[str, Any]]) -> Iterator[Tuple]:
+    """One row per cell of every `rows` grid from the table extractor."""
+    for tbl in tables:
+        for r, row in enumerate(tbl.get("rows") or []):
+            for c, cell in enumerate(row):
+                yield filename, tbl.get("table_index"), tbl.get("caption"), r, c, cell
+
+
+# ---------------------------------------------------------------------
+# Dataset writer
+# ---------------------------------------------------------------------
+class _Dictionary:
+    """Append-only string dictionary shared by every batch of one column.
+
+    Each batch's dictionary extends the previous one, which Arrow IPC files
+    accept as dictionary deltas.
+    """
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def indices(self, items: List[Optional[str]]) -> List[Optional[int]]:
+        out: List[Optional[int]] = []
+        for v in items:
+            if v is None:
+                out.append(None)
+                continue
+            i = self._index.get(v)
+            if i is None:
+                i = self._index[v] = len(self.values)
+                self.values.append(v)
+            out.append(i)
+        return out
+
+
+class _DatasetWriter:
+    def __init__(
+        self,
+        directory: str,
+        columns: Tuple[str, ...],
+        fmt: str,
+        row_group_size: int,
+        part_row_groups: int = COLUMNAR_PART_ROW_GROUPS,
+        part_max_bytes: int = COLUMNAR_PART_MAX_BYTES,
+    ):
+        import pyarrow as pa
+
+        self._pa = pa
+        self.directory = directory
+        self.columns = columns
+        self.fmt = fmt
+        self.row_group_size = row_group_size
+        self.part_row_groups = part_row_groups
+        self.part_max_bytes = part_max_bytes
+        self._prefix = f"part-{datetime.now().strftime('%Y%m%d_%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._parts = 0
+        self._buffer: List[Tuple] = []
+        self._dicts: Dict[str, _Dictionary] = {}   # Arrow IPC only, reset per part
+        self._writer = None
+        self._tmp_path: Optional[str] = None
+        self._groups = 0
+        # row counters: received, in written row groups, in closed parts
+        self.received = 0
+        self._written = 0
+        self.committed = 0
+
+        fields = []
+        for c in columns:
+            if c in _DICT_COLUMNS:
+                fields.append(pa.field(c, pa.dictionary(pa.int32(), pa.string())))
+            elif c in _INT_COLUMNS:
+                fields.append(pa.field(c, pa.int32()))
+            else:
+                fields.append(pa.field(c, pa.string()))
+        self.schema = pa.schema(fields)
+
+    def extend(self, rows: Iterator[Tuple]) -> None:
+        before = len(self._buffer)
+        self._buffer.extend(rows)
+        self.received += len(self._buffer) - before
+        while len(self._buffer) >= self.row_group_size:
+            chunk = self._buffer[: self.row_group_size]
+            del self._buffer[: self.row_group_size]
+            self._write(chunk)
+
+    def _open_part(self) -> None:
+        pa = self._pa
+        os.makedirs(self.directory, exist_ok=True)
+        self._tmp_path = os.path.join(self.directory, f".{self._prefix}-{self._parts:05d}.{self.fmt}.tmp")
+        self._dicts = {c: _Dictionary() for c in self.columns if c in _DICT_COLUMNS}
+        self._groups = 0
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(
+                self._tmp_path, self.schema, use_dictionary=sorted(self._dicts), compression="zstd"
+            )
+        else:
+            options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self._writer = pa.ipc.new_file(self._tmp_path, self.schema, options=options)
+
+    def _close_part(self) -> None:
+        """Write the footer and publish the part under its final name."""
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._writer = None
+        path = os.path.join(self.directory, f"{self._prefix}-{self._parts:05d}.{self.fmt}")
+        os.replace(self._tmp_path, path)
+        self._parts += 1
+        self.committed = self._written
+        logger.info(f"💾 Columnar part written to: {path}")
+
+    def _write(self, rows: List[Tuple]) -> None:
+        pa = self._pa
+        if self._writer is None:
+            self._open_part()
+        arrays = []
+        for j, c in enumerate(self.columns):
+            values = [r[j] for r in rows]
+            if c in _DICT_COLUMNS and self.fmt == "parquet":
+                # Parquet re-encodes per row group; keep the dictionary local
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            elif c in _DICT_COLUMNS:
+                d = self._dicts[c]
+                idx = pa.array(d.indices(values), type=pa.int32())
+                arrays.append(pa.DictionaryArray.from_arrays(idx, pa.array(d.values, type=pa.string())))
+            else:
+                arrays.append(pa.array(values, type=self.schema.field(c).type))
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+        if self.fmt == "parquet":
+            self._writer.write_table(pa.Table.from_batches([batch]), row_group_size=len(rows))
+        else:
+            self._writer.write_batch(batch)
+
+        self._written += len(rows)
+        self._groups += 1
+        if self._groups >= self.part_row_groups or os.path.getsize(self._tmp_path) >= self.part_max_bytes:
+            self._close_part()
+
+    def flush(self) -> None:
+        """Write buffered rows and close the open part, making it readable."""
+        if self._buffer:
+            self._write(self._buffer)
+            self._buffer = []
+        self._close_part()
+
+    def close(self) -> None:
+        self.flush()
+
+
+class ColumnarExporter:
+    """Appends paragraphs and table cells to `<dataset_dir>/<dataset>/part-*.{parquet,arrow}`."""
+
+    def __init__(
+        self,
+        dataset_dir: str,
+        fmt: str = "parquet",
+        row_group_size: int = COLUMNAR_ROW_GROUP_SIZE,
+        part_row_groups: int = COLUMNAR_PART_ROW_GROUPS,
+        part_max_bytes: int = COLUMNAR_PART_MAX_BYTES,
+    ):
+        if fmt not in ("parquet", "arrow"):
+            raise ValueError(f"Unsupported columnar format: {fmt}")
+        self.paragraphs = _DatasetWriter(
+            os.path.join(dataset_dir, "paragraphs"), PARAGRAPH_COLUMNS, fmt,
+            row_group_size, part_row_groups, part_max_bytes,
+        )
+        self.table_cells = _DatasetWriter(
+            os.path.join(dataset_dir, "table_cells"), TABLE_CELL_COLUMNS, fmt,
+            row_group_size, part_row_groups, part_max_bytes,
+        )
+
+    def add(self, filename: str, kind: str, payload: Any) -> Tuple[int, int]:
+        """
+        Flatten one route payload (`all`, `sections` or `tables`) into the
+        datasets. Returns a ticket for `is_committed`.
+        """
+        if kind == "all":
+            self.paragraphs.extend(paragraph_rows(filename, payload.get("extracted_sections") or {}))
+            self.table_cells.extend(table_cell_rows(filename, payload.get("tables") or []))
+        elif kind == "sections":
+            self.paragraphs.extend(paragraph_rows(filename, payload))
+        elif kind == "tables":
+            self.table_cells.extend(table_cell_rows(filename, payload))
+        return self.paragraphs.received, self.table_cells.received
+
+    def is_committed(self, ticket: Tuple[int, int]) -> bool:
+        """True once every row added up to `ticket` sits in a closed part file."""
+        return self.paragraphs.committed >= ticket[0] and self.table_cells.committed >= ticket[1]
+
+    def flush(self) -> None:
+        self.paragraphs.flush()
+        self.table_cells.flush()
+
+    def close(self) -> None:
+        self.paragraphs.close()
+        self.table_cells.close()
+
+
+def export_json_outputs(outputs_dir: str, dataset_dir: str, fmt: str = "parquet") -> int:
+    """Convert existing `*_all.json` outputs into columnar datasets; returns files read."""
+    exporter = ColumnarExporter(dataset_dir, fmt)
+    count = 0
+    try:
+        for path in sorted(glob.glob(os.path.join(outputs_dir, "*_all.json"))):
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+            exporter.add(payload.get("filename") or os.path.basename(path), "all", payload)
+            count += 1
+    finally:
+        exporter.close()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export *_all.json outputs to Parquet/Arrow datasets")
+    parser.add_argument("outputs_dir")
+    parser.add_argument("dataset_dir")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    args = parser.parse_args()
+    n = export_json_outputs(args.outputs_dir, args.dataset_dir, args.format)
+    print(f"Exported {n} file(s) to {args.dataset_dir}")
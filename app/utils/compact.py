@@ -0,0 +1,281 @@
+"""
+app/utils/compact.py
+--------------------
+Memory-lean per-document results.
+
+All paragraph, cell and footnote text of one document lives in a single
+UTF-8 `bytes` buffer, cut into pieces by one `array("I")` of end offsets;
+sections and tables only hold piece ranges into it (tables also keep their
+row lengths and which cells were None, so ragged grids round-trip).
+Headings are interned. The nested dict/list shape the API returns is built
+by `to_dict()` at the response/persistence boundary and dropped right after
+serialization.
+
+`python -m app.utils.compact [--docs N]` prints the per-document footprint
+of a synthetic paper held as nested dicts vs. as a DocumentResult.
+"""
+
+import argparse
+import random
+import sys
+import tracemalloc
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class TextBuffer:
+    """Append-only UTF-8 store; piece k spans ends[k-1]:ends[k] (uint32 end offsets only)."""
+
+    __slots__ = ("_buf", "ends")
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.ends = array("I")
+
+    def add(self, text: str) -> None:
+        self._buf += text.encode("utf-8")
+        self.ends.append(len(self._buf))
+
+    def span(self, texts: List[str]) -> Tuple[int, int]:
+        """Append `texts`; returns (first piece index, count)."""
+        first = len(self.ends)
+        for t in texts:
+            self.add(t)
+        return first, len(self.ends) - first
+
+    def freeze(self) -> bytes:
+        return bytes(self._buf)
+
+
+def _texts(buf: bytes, ends: array, first: int, count: int) -> List[str]:
+    start = ends[first - 1] if first else 0
+    out = []
+    for k in range(first, first + count):
+        out.append(buf[start:ends[k]].decode("utf-8"))
+        start = ends[k]
+    return out
+
+
+def _intern(s: Optional[str]) -> Optional[str]:
+    return sys.intern(s) if s else s
+
+
+@dataclass(slots=True)
+class Subsection:
+    subheading: Optional[str]
+    first: int                      # piece range in the document buffer
+    count: int
+
+
+@dataclass(slots=True)
+class Section:
+    key: str
+    heading: Optional[str]
+    shape: str                      # "text" | "list" | "map" | "subsections" | "raw"
+    subsections: List[Subsection] = field(default_factory=list)
+    similarity_score: Optional[float] = None
+    raw: Any = None                 # content kept as-is for shape "raw"
+
+    def to_dict(self, buf: bytes, ends: array) -> Dict[str, Any]:
+        if self.shape == "raw":
+            return {"heading": self.heading, "content": self.raw}
+        if self.shape in ("text", "list"):
+            sub = self.subsections[0]
+            texts = _texts(buf, ends, sub.first, sub.count)
+            return {"heading": self.heading, "content": texts[0] if self.shape == "text" else texts}
+        if self.shape == "map":
+            return {
+                "heading": self.heading,
+                "similarity_score": self.similarity_score,
+                "content": {s.subheading: _texts(buf, ends, s.first, s.count) for s in self.subsections},
+            }
+        return {
+            "heading": self.heading,
+            "subsections": [
+                {"subheading": s.subheading, "content": _texts(buf, ends, s.first, s.count)}
+                for s in self.subsections
+            ],
+        }
+
+
+@dataclass(slots=True)
+class TableGrid:
+    table_index: int
+    caption: Optional[str]
+    first: int                      # first cell piece; cells are row-major
+    row_lengths: array              # cells per row (rows may be ragged)
+    nulls: Optional[array]          # cell positions that were None, if any
+    footnotes_first: int
+    footnotes_count: int
+
+    def rows(self, buf: bytes, ends: array) -> List[List[Optional[str]]]:
+        flat: List[Optional[str]] = _texts(buf, ends, self.first, sum(self.row_lengths))
+        for k in self.nulls or ():
+            flat[k] = None
+        out, pos = [], 0
+        for n in self.row_lengths:
+            out.append(flat[pos:pos + n])
+            pos += n
+        return out
+
+    def to_dict(self, buf: bytes, ends: array) -> Dict[str, Any]:
+        return {
+            "table_index": self.table_index,
+            "caption": self.caption,
+            "rows": self.rows(buf, ends),
+            "footnotes": _texts(buf, ends, self.footnotes_first, self.footnotes_count),
+        }
+
+
+@dataclass(slots=True)
+class DocumentResult:
+    filename: str
+    text: bytes
+    ends: array                     # uint32 end offset of every text piece
+    sections: List[Section]
+    tables: List[TableGrid]
+    tei: Dict[str, Any] = field(default_factory=dict)   # {} | {"tei_ref": ...}
+    tei_bytes: Optional[bytes] = None                     # kept raw for tei=full
+
+    @classmethod
+    def build(
+        cls,
+        filename: str,
+        sections: Dict[str, Any],
+        tables: List[Dict[str, Any]],
+        tei: Dict[str, Any],
+        tei_bytes: Optional[bytes] = None,
+    ) -> "DocumentResult":
+        """Pack the extractor dicts; `tei` holds any non-raw TEI fields."""
+        buf = TextBuffer()
+        packed: List[Section] = []
+
+        for key, sec in sections.items():
+            heading = _intern(sec.get("heading"))
+            content = sec.get("content")
+            if "subsections" in sec:
+                subs = [
+                    Subsection(_intern(s.get("subheading")), *buf.span(s["content"]))
+                    for s in sec["subsections"]
+                ]
+                packed.append(Section(key, heading, "subsections", subs))
+            elif isinstance(content, dict):
+                subs = [Subsection(_intern(name), *buf.span(paras)) for name, paras in content.items()]
+                packed.append(Section(key, heading, "map", subs, sec.get("similarity_score")))
+            elif isinstance(content, list):
+                packed.append(Section(key, heading, "list", [Subsection(None, *buf.span(content))]))
+            elif isinstance(content, str):
+                packed.append(Section(key, heading, "text", [Subsection(None, *buf.span([content]))]))
+            else:
+                packed.append(Section(key, heading, "raw", raw=content))
+
+        grids: List[TableGrid] = []
+        for tbl in tables:
+            rows = tbl.get("rows") or []
+            first = len(buf.ends)
+            nulls = array("I")
+            for row in rows:
+                for cell in row:
+                    if cell is None:
+                        nulls.append(len(buf.ends) - first)
+                        buf.add("")
+                    else:
+                        buf.add(cell)
+            grids.append(TableGrid(
+                tbl["table_index"], tbl.get("caption"), first,
+                array("I", (len(r) for r in rows)), nulls or None,
+                *buf.span(tbl.get("footnotes") or []),
+            ))
+
+        return cls(sys.intern(filename), buf.freeze(), buf.ends, packed, grids, tei, tei_bytes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The public JSON shape (same as the former nested-dict result)."""
+        out: Dict[str, Any] = {"filename": self.filename}
+        if self.tei_bytes is not None:
+            out["tei_xml"] = self.tei_bytes.decode("utf-8")
+        out.update(self.tei)
+        out["extracted_sections"] = {s.key: s.to_dict(self.text, self.ends) for s in self.sections}
+        out["tables"] = [t.to_dict(self.text, self.ends) for t in self.tables]
+        return out
+
+
+def to_jsonable(result: Any) -> Any:
+    """Expand compact results; pass plain dicts/lists through untouched."""
+    return result.to_dict() if hasattr(result, "to_dict") else result
+
+
+# ---------------------------------------------------------------------
+# Memory benchmark
+# ---------------------------------------------------------------------
+def _synthetic_result(i: int, rng: random.Random) -> Dict[str, Any]:
+    words = ["cells", "were", "incubated", "at", "37", "°C", "for", "24", "h", "with",
+             "10", "µM", "compound", "and", "analysed", "by", "flow", "cytometry", "(n", "=", "3)."]
+
+    def para() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(40, 160)))
+
+    def paras(n: int) -> List[str]:
+        return [para() for _ in range(n)]
+
+    return {
+        "filename": f"paper_{i:05d}.pdf",
+        "extracted_sections": {
+            "title": {"heading": "title", "content": para()[:120]},
+            "abstract": {"heading": "Abstract", "content": paras(2)},
+            "methods": {
+                "heading": "Methods",
+                "similarity_score": 0.912,
+                "content": {f"2.{k} Protocol": paras(4) for k in range(1, 7)},
+            },
+            "results_discussion": {
+                "heading": "Results",
+                "subsections": [
+                    {"subheading": f"3.{k} Finding", "content": paras(5)} for k in range(1, 8)
+                ],
+            },
+        },
+        "tables": [
+            {
+                "table_index": t,
+                "caption": f"Table {t + 1}. Summary statistics",
+                "rows": [[f"{rng.random():.3f}" for _ in range(6)] for _ in range(25)] + [["n", None]],
+                "footnotes": ["Values are mean ± SD."],
+            }
+            for t in range(3)
+        ],
+    }
+
+
+def _footprint(build, n: int) -> Tuple[int, List[Any]]:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [build(i) for i in range(n)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, held
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Per-document memory footprint of extraction results.")
+    parser.add_argument("--docs", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    dict_bytes, dicts = _footprint(lambda i: _synthetic_result(i, random.Random(i)), args.docs)
+
+    def compact(i: int) -> DocumentResult:
+        r = _synthetic_result(i, random.Random(i))
+        return DocumentResult.build(r["filename"], r["extracted_sections"], r["tables"], {})
+
+    compact_bytes, compacts = _footprint(compact, args.docs)
+    assert all(c.to_dict() == d for c, d in zip(compacts, dicts))
+
+    print(f"documents       : {args.docs}")
+    print(f"nested dicts    : {dict_bytes / args.docs / 1024:8.1f} KiB/doc")
+    print(f"DocumentResult  : {compact_bytes / args.docs / 1024:8.1f} KiB/doc")
+    print(f"ratio           : {compact_bytes / dict_bytes:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""
+app/utils/output_writer.py
+--------------------------
+Pluggable persistence for extraction results.
+
+Configured through environment variables:
+  OUTPUT_FORMATS      comma list of json, jsonl, txt, parquet, arrow, none
+                      (default "json,txt")
+  OUTPUT_COMPRESSION  none | gzip | zstd                      (default "none")
+  OUTPUT_WRITE_MODE   background | sync                       (default "background")
+  OUTPUT_BATCH_SIZE   max records drained per background batch (default 64)
+  OUTPUT_QUEUE_SIZE   max records waiting for the writer thread  (default 256)
+  COLUMNAR_FLUSH_SECONDS  idle time after which buffered parquet/arrow rows
+                      are written and their part file closed   (default 60)
+
+In background mode routes only enqueue; a single writer thread serializes
+and writes in batches. Coroutines use `submit_async`, which never blocks the
+event loop: when the queue is full (disk slower than extraction) it waits
+for the writer in a worker thread, so backpressure slows the producing
+request down without stalling the others. `submit` is the blocking variant
+for plain threads.
+parquet/arrow (at most one of them) append to rolling part files of columnar
+datasets under `datasets/` (see `app.utils.columnar_export`); `flush()`
+closes the open parts so they can be read.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.columnar_export import ColumnarExporter
+from app.utils.compact import to_jsonable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "outputs")
+OUTPUT_FORMATS = {
+    f.strip() for f in os.getenv("OUTPUT_FORMATS", "json,txt").split(",") if f.strip()
+}
+OUTPUT_COMPRESSION = os.getenv("OUTPUT_COMPRESSION", "none")
+OUTPUT_WRITE_MODE = os.getenv("OUTPUT_WRITE_MODE", "background")
+OUTPUT_BATCH_SIZE = int(os.getenv("OUTPUT_BATCH_SIZE", "64"))
+OUTPUT_QUEUE_SIZE = int(os.getenv("OUTPUT_QUEUE_SIZE", "256"))
+COLUMNAR_FLUSH_SECONDS = float(os.getenv("COLUMNAR_FLUSH_SECONDS", "60"))
+
+_SUFFIX = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+# ---------------------------------------------------------------------
+# Serialization
+# ---------------------------------------------------------------------
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON; orjson when installed, stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data)
+    if compression == "zstd":
+        import zstandard  # optional dependency, only needed for zstd output
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+# ---------------------------------------------------------------------
+# TXT rendering
+# ---------------------------------------------------------------------
+def _sections_txt(sections: Dict[str, Any]) -> str:
+    out: List[str] = []
+    for key, sec in sections.items():
+        out.append(f"### {sec.get('heading', key).upper()}\n\n")
+        if key == "methods":
+            for sub, paras in sec.get("content", {}).items():
+                out.append(f"#### {sub}\n")
+                for para in paras:
+                    out.append(para + "\n\n")
+        elif key == "results_discussion":
+            for subsec in sec.get("subsections", []):
+                out.append(f"#### {subsec['subheading']}\n")
+                for para in subsec["content"]:
+                    out.append(para + "\n\n")
+        elif isinstance(sec.get("content"), list):
+            for para in sec.get("content", []):
+                out.append(para + "\n\n")
+        else:
+            out.append((sec.get("content") or "") + "\n\n")
+    return "".join(out)
+
+
+def _tables_txt(tables: List[Dict[str, Any]], level: str = "###") -> str:
+    out: List[str] = []
+    for tbl in tables:
+        out.append(f"{level} TABLE {tbl['table_index']}: {tbl.get('caption') or ''}\n")
+        for row in tbl["rows"]:
+            out.append(" | ".join(str(cell) if cell is not None else "" for cell in row) + "\n")
+        if tbl.get("footnotes"):
+            out.append("\n*Footnotes:* " + " ".join(tbl["footnotes"]) + "\n")
+        out.append("\n")
+    return "".join(out)
+
+
+def render_txt(kind: str, payload: Any) -> str:
+    """Human-readable rendering of a route's payload."""
+    if kind == "all":
+        txt = _sections_txt(payload.get("extracted_sections", {}))
+        tables = payload.get("tables") or []
+        if tables:
+            txt += "\n### TABLES\n\n" + _tables_txt(tables, level="####")
+        return txt
+    if kind == "sections":
+        return _sections_txt(payload)
+    if kind == "tables":
+        return _tables_txt(payload)
+    if kind == "methods":
+        return payload.get("methods_section", "")
+    raise ValueError(f"Unknown output kind: {kind}")
+
+
+# ---------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------
+def safe_filename(filename: str) -> str:
+    """Filename as used in output paths (`<safe>_<timestamp>_<kind>.<fmt>`)."""
+    return filename.replace(" ", "_").replace("/", "_")
+
+
+Record = Tuple[str, str, Any, str, Optional[Callable[[], None]]]  # (filename, kind, payload, timestamp, on_written)
+
+
+class OutputWriter:
+    """Persists route payloads in the configured formats."""
+
+    def __init__(
+        self,
+        output_dir: str = OUTPUT_DIR,
+        formats: Optional[set] = None,
+        compression: str = OUTPUT_COMPRESSION,
+        mode: str = OUTPUT_WRITE_MODE,
+        batch_size: int = OUTPUT_BATCH_SIZE,
+        queue_size: int = OUTPUT_QUEUE_SIZE,
+    ):
+        if compression not in _SUFFIX:
+            raise ValueError(f"Unsupported OUTPUT_COMPRESSION: {compression}")
+        if compression == "zstd":
+            # checked here, not on the writer thread where it would only be logged
+            try:
+                import zstandard  # noqa: F401
+            except ImportError as e:
+                raise ValueError("OUTPUT_COMPRESSION=zstd requires the zstandard package") from e
+        self.output_dir = output_dir
+        self.formats = (OUTPUT_FORMATS if formats is None else formats) - {"none"}
+        if {"parquet", "arrow"} <= self.formats:
+            raise ValueError("OUTPUT_FORMATS may list only one of parquet, arrow")
+        if self.formats & {"parquet", "arrow"}:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise ValueError("OUTPUT_FORMATS parquet/arrow requires the pyarrow package") from e
+        self.compression = compression
+        self.mode = mode
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Optional[Record]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._columnar: Optional[ColumnarExporter] = None
+        self._columnar_lock = threading.Lock()
+        self._columnar_dirty = False
+        # (columnar ticket, on_written) waiting for their rows' part file to close
+        self._columnar_waiting: "deque[Tuple[Tuple[int, int], Callable[[], None]]]" = deque()
+
+    # ── public API ────────────────────────────────────────────────────
+    def submit(
+        self,
+        filename: str,
+        kind: str,
+        payload: Any,
+        on_written: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Persist one payload from a plain thread; returns immediately in
+        background mode unless the queue is full, in which case it blocks.
+        `on_written` is called (on the writer thread, or the thread calling
+        `flush`/`close`) only once every configured format holds this payload
+        on disk; for parquet/arrow that is when its part file is closed. It
+        is never called if any format failed.
+        """
+        record = self._record(filename, kind, payload, on_written)
+        if record is None:
+            return
+        if self.mode == "sync":
+            self._write_batch([record])
+        elif not self._enqueue_nowait(record):
+            self._queue.put(record)
+
+    async def submit_async(
+        self,
+        filename: str,
+        kind: str,
+        payload: Any,
+        on_written: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """`submit` for coroutines: waiting (full queue, sync mode) happens off the event loop."""
+        record = self._record(filename, kind, payload, on_written)
+        if record is None:
+            return
+        if self.mode == "sync":
+            await asyncio.to_thread(self._write_batch, [record])
+        elif not self._enqueue_nowait(record):
+            await asyncio.to_thread(self._queue.put, record)
+
+    def flush(self) -> None:
+        """
+        Block until every queued record has been written, and close the open
+        columnar part files so their rows are readable.
+        """
+        if self._thread is not None:
+            self._queue.join()
+        self._flush_columnar()
+
+    def close(self) -> None:
+        """Drain the queue, stop the writer thread and finalize datasets."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._flush_columnar()
+        with self._columnar_lock:
+            self._columnar = None
+            if self._columnar_waiting:
+                logger.error(f"❌ {len(self._columnar_waiting)} record(s) never reached a columnar part")
+                self._columnar_waiting.clear()
+
+    # ── background thread ─────────────────────────────────────────────
+    def _record(self, filename, kind, payload, on_written) -> Optional[Record]:
+        if not self.formats:
+            if on_written is not None:
+                on_written()
+            return None
+        return filename, kind, payload, datetime.now().strftime("%Y%m%d_%H%M%S"), on_written
+
+    def _enqueue_nowait(self, record: Record) -> bool:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            # backpressure: the caller waits for the writer rather than buffer without bound
+            logger.warning(f"⚠️ Output queue full ({self._queue.maxsize}); waiting for writer")
+            return False
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="output-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch: List[Record] = []
+            try:
+                # idle with rows buffered → publish them instead of waiting on
+                item = self._queue.get(timeout=COLUMNAR_FLUSH_SECONDS if self._columnar_dirty else None)
+            except queue.Empty:
+                self._flush_columnar()
+                continue
+            taken = 1
+            if item is None:
+                stop = True
+            else:
+                batch.append(item)
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+            try:
+                if batch:
+                    self._write_batch(batch)
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    # ── file output ───────────────────────────────────────────────────
+    def _write_batch(self, batch: List[Record]) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        suffix = _SUFFIX[self.compression]
+        jsonl_lines: Dict[str, List[bytes]] = defaultdict(list)
+        jsonl_records: Dict[str, List[int]] = defaultdict(list)
+        ok = [True] * len(batch)                      # every format succeeded
+        tickets: List[Optional[Tuple[int, int]]] = [None] * len(batch)
+
+        for i, (filename, kind, payload, timestamp, _) in enumerate(batch):
+            payload = to_jsonable(payload)  # compact results expand here, off the event loop
+            stem = os.path.join(self.output_dir, f"{safe_filename(filename)}_{timestamp}_{kind}")
+
+            if "json" in self.formats:
+                ok[i] &= self._write_file(f"{stem}.json{suffix}", dumps(payload), filename, "JSON")
+            if "txt" in self.formats:
+                try:
+                    data = render_txt(kind, payload).encode("utf-8")
+                except Exception as e:
+                    logger.error(f"❌ TXT render failed for {filename}: {e}")
+                    ok[i] = False
+                else:
+                    ok[i] &= self._write_file(f"{stem}.txt{suffix}", data, filename, "TXT")
+            if "jsonl" in self.formats:
+                if isinstance(payload, dict):
+                    line = {"filename": filename, **payload}
+                else:
+                    line = {"filename": filename, kind: payload}
+                jsonl_lines[kind].append(dumps(line) + b"\n")
+                jsonl_records[kind].append(i)
+
+            columnar_fmt = next((f for f in ("parquet", "arrow") if f in self.formats), None)
+            if columnar_fmt:
+                try:
+                    with self._columnar_lock:
+                        if self._columnar is None:
+                            self._columnar = ColumnarExporter(
+                                os.path.join(self.output_dir, "datasets"), columnar_fmt
+                            )
+                        tickets[i] = self._columnar.add(filename, kind, payload)
+                        self._columnar_dirty = True
+                except Exception as e:
+                    logger.error(f"❌ Columnar export failed for {filename}: {e}")
+                    ok[i] = False
+
+        # one append per JSONL file per batch
+        for kind, lines in jsonl_lines.items():
+            path = os.path.join(self.output_dir, f"{kind}.jsonl{suffix}")
+            try:
+                with open(path, "ab") as f:
+                    f.write(_compress(b"".join(lines), self.compression))
+                logger.info(f"💾 {len(lines)} JSONL record(s) appended to: {path}")
+            except Exception as e:
+                logger.error(f"❌ JSONL append failed for {path}: {e}")
+                for i in jsonl_records[kind]:
+                    ok[i] = False
+
+        for i, (filename, *_, on_written) in enumerate(batch):
+            if on_written is None:
+                continue
+            if not ok[i]:
+                logger.warning(f"⚠️ Output incomplete for {filename}; not confirming it")
+            elif tickets[i] is not None:
+                with self._columnar_lock:
+                    self._columnar_waiting.append((tickets[i], on_written))
+            else:
+                _call(on_written)
+        self._release_columnar()
+
+    def _release_columnar(self) -> None:
+        """Confirm records whose columnar rows are now in closed part files."""
+        ready = []
+        with self._columnar_lock:
+            while self._columnar_waiting and self._columnar is not None \
+                    and self._columnar.is_committed(self._columnar_waiting[0][0]):
+                ready.append(self._columnar_waiting.popleft()[1])
+        for on_written in ready:
+            _call(on_written)
+
+    def _flush_columnar(self) -> None:
+        with self._columnar_lock:
+            if self._columnar is None or not self._columnar_dirty:
+                return
+            try:
+                self._columnar.flush()
+            except Exception as e:
+                # rows of the open part are lost: drop their confirmations and
+                # start a fresh exporter for later records
+                logger.error(f"❌ Columnar flush failed, {len(self._columnar_waiting)} record(s) unconfirmed: {e}")
+                self._columnar_waiting.clear()
+                self._columnar = None
+            self._columnar_dirty = False
+        self._release_columnar()
+
+    def _write_file(self, path: str, data: bytes, filename: str, label: str) -> bool:
+        try:
+            with open(path, "wb") as f:
+                f.write(_compress(data, self.compression))
+            logger.info(f"💾 {label} written to: {path}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ {label} write failed for {filename}: {e}")
+            return False
+
+
+def _call(on_written: Callable[[], None]) -> None:
+    try:
+        on_written()
+    except Exception as e:
+        logger.error(f"❌ Output callback failed: {e}")
+
+
+_writer: Optional[OutputWriter] = None
+
+def get_writer() -> OutputWriter:
+    """Lazily initialize and return the shared output writer."""
+    global _writer
+    if _writer is None:
+        _writer = OutputWriter()
+    return _writer
+
+def close_writer() -> None:
+    """Flush pending output and stop the writer (call during app shutdown)."""
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
@@ -0,0 +1,281 @@
+"""
+app/utils/profiling.py
+----------------------
+Opt-in per-request / per-stage profiling.
+
+A request is profiled when it is picked by the admin sample rate, or when
+it carries `X-Profile: <PROFILE_TOKEN>` (or `?profile=<PROFILE_TOKEN>`). The
+flag is ignored unless PROFILE_TOKEN is set, so clients cannot switch on
+profiling by themselves. For a profiled request:
+  - every `profile_task` (one per file in `process_file`, the table route)
+    is run under a sampling profiler: pyinstrument when installed
+    (`<label>.html` + `<label>.speedscope.json` flamegraph), otherwise
+    cProfile (`<label>.pstats`, view with snakeviz / flameprof);
+  - every `profile_stage` (TEI parse, section matching, Docling) records
+    wall time and its tracemalloc peak; `cpu=True` stages also get their
+    own profile, which is how work pushed to worker threads is captured.
+Everything lands in `outputs/profiles/<profile_id>/`, with `summary.json`
+listing the stages. The id is returned in the `X-Profile-Id` header.
+
+Configured through environment variables:
+  PROFILE_SAMPLE_RATE   fraction of requests profiled without a flag (default 0)
+  PROFILE_TOKEN         secret the header/query flag must carry; unset
+                        disables the flag                           (default unset)
+  PROFILER              auto | pyinstrument | cprofile             (default auto)
+  PROFILE_INTERVAL      pyinstrument sampling interval, seconds     (default 0.001)
+  PROFILE_TRACEMALLOC   0 to skip allocation tracking               (default 1)
+
+tracemalloc is process-wide: stages that overlap (concurrent profiled
+files) report a shared peak, flagged with `"overlapping": true`. Only one
+sampling profiler runs per thread; a task that finds its thread busy is
+timed but not sampled.
+"""
+
+import asyncio
+import cProfile
+import hmac
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.utils.logger import setup_logger
+from app.utils.output_writer import safe_filename
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # pragma: no cover - optional dependency
+    Profiler = None
+
+logger = setup_logger(__name__)
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), "..", "outputs", "profiles")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILER = os.getenv("PROFILER", "auto")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "1") != "0"
+
+
+# ---------------------------------------------------------------------
+# Sessions
+# ---------------------------------------------------------------------
+@dataclass
+class ProfileSession:
+    profile_id: str
+    directory: str
+    stages: List[Dict[str, Any]] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.stages.append(entry)
+
+    def write_summary(self) -> None:
+        path = os.path.join(self.directory, "summary.json")
+        with self._lock:
+            data = {"profile_id": self.profile_id, "stages": list(self.stages)}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        logger.info(f"🔬 Profile written: {self.directory}")
+
+
+# the session of the request being handled; copied into to_thread workers
+_current: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+_current_label: ContextVar[str] = ContextVar("profile_label", default="")
+
+
+def profiling_requested(request: Any) -> bool:
+    """Admin token in the header/query flag, else the admin sample rate."""
+    flag = request.headers.get("x-profile") or request.query_params.get("profile")
+    if flag and PROFILE_TOKEN and hmac.compare_digest(flag.encode(), PROFILE_TOKEN.encode()):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def new_session(root: str = PROFILE_DIR) -> ProfileSession:
+    profile_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    directory = os.path.join(root, profile_id)
+    os.makedirs(directory, exist_ok=True)
+    return ProfileSession(profile_id, directory)
+
+
+def start_session(request: Any) -> Optional[ProfileSession]:
+    """A fresh session if this request should be profiled, else None."""
+    return new_session() if profiling_requested(request) else None
+
+
+# ---------------------------------------------------------------------
+# Sampling profilers (one per thread)
+# ---------------------------------------------------------------------
+_busy_threads: set = set()
+_busy_lock = threading.Lock()
+
+
+def _claim_thread() -> bool:
+    tid = threading.get_ident()
+    with _busy_lock:
+        if tid in _busy_threads:
+            return False
+        _busy_threads.add(tid)
+        return True
+
+
+def _release_thread() -> None:
+    with _busy_lock:
+        _busy_threads.discard(threading.get_ident())
+
+
+def _start_profiler(async_mode: bool) -> Optional[Tuple[str, Any]]:
+    if not _claim_thread():
+        return None
+    try:
+        if Profiler is not None and PROFILER in ("auto", "pyinstrument"):
+            p = Profiler(interval=PROFILE_INTERVAL, async_mode="enabled" if async_mode else "disabled")
+            p.start()
+            return "pyinstrument", p
+        p = cProfile.Profile()
+        p.enable()
+        return "cprofile", p
+    except Exception as e:
+        _release_thread()
+        logger.warning(f"⚠️ Could not start profiler: {e}")
+        return None
+
+
+def _stop_profiler(handle: Tuple[str, Any]) -> None:
+    kind, p = handle
+    try:
+        if kind == "pyinstrument":
+            p.stop()
+        else:
+            p.disable()
+    finally:
+        _release_thread()
+
+
+def _dump_profile(handle: Tuple[str, Any], stem: str) -> List[str]:
+    kind, p = handle
+    if kind == "pyinstrument":
+        files = [f"{stem}.html", f"{stem}.speedscope.json"]
+        with open(files[0], "w", encoding="utf-8") as f:
+            f.write(p.output_html())
+        with open(files[1], "w", encoding="utf-8") as f:
+            f.write(p.output(SpeedscopeRenderer()))
+    else:
+        files = [f"{stem}.pstats"]
+        p.dump_stats(files[0])
+    return [os.path.basename(x) for x in files]
+
+
+# ---------------------------------------------------------------------
+# Allocation peaks
+# ---------------------------------------------------------------------
+_trace_lock = threading.Lock()
+_trace_users = 0
+_trace_owned = False
+
+
+def _trace_begin() -> Tuple[int, bool]:
+    """Start (or join) tracing; returns (baseline bytes, overlapping)."""
+    global _trace_users, _trace_owned
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _trace_owned = True
+        overlapping = _trace_users > 0
+        if not overlapping:
+            tracemalloc.reset_peak()
+        _trace_users += 1
+        return tracemalloc.get_traced_memory()[0], overlapping
+
+
+def _trace_end(baseline: int) -> int:
+    """Peak bytes above the baseline; stops tracing if we started it."""
+    global _trace_users, _trace_owned
+    with _trace_lock:
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_owned:
+            tracemalloc.stop()
+            _trace_owned = False
+        return max(peak, 0)
+
+
+# ---------------------------------------------------------------------
+# Public hooks
+# ---------------------------------------------------------------------
+@asynccontextmanager
+async def profile_task(session: Optional[ProfileSession], label: str, stage: str):
+    """
+    Sample a coroutine (e.g. one file in `process_file`) and make `session`
+    visible to the `profile_stage`s it reaches. No-op without a session.
+    """
+    if session is None:
+        yield
+        return
+
+    token = _current.set(session)
+    label_token = _current_label.set(label)
+    handle = _start_profiler(async_mode=True)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        _current.reset(token)
+        _current_label.reset(label_token)
+        entry: Dict[str, Any] = {"label": label, "stage": stage, "seconds": round(seconds, 4)}
+        if handle is not None:
+            _stop_profiler(handle)
+            stem = os.path.join(session.directory, f"{safe_filename(label)}_{stage}")
+            try:
+                entry["profiles"] = await asyncio.to_thread(_dump_profile, handle, stem)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not write profile for {label}: {e}")
+        else:
+            entry["profiles"] = []
+        session.record(entry)
+
+
+@contextmanager
+def profile_stage(stage: str, cpu: bool = False) -> Iterator[None]:
+    """
+    Time a heavy stage and record its tracemalloc peak when the current
+    request is profiled; `cpu=True` also samples it (use for stages that
+    run in worker threads). No-op otherwise.
+    """
+    session = _current.get()
+    if session is None:
+        yield
+        return
+
+    label = _current_label.get()
+    handle = _start_profiler(async_mode=False) if cpu else None
+    baseline, overlapping = _trace_begin() if PROFILE_TRACEMALLOC else (0, False)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        entry: Dict[str, Any] = {"label": label, "stage": stage, "seconds": round(seconds, 4)}
+        if PROFILE_TRACEMALLOC:
+            entry["tracemalloc_peak_bytes"] = _trace_end(baseline)
+            entry["overlapping"] = overlapping
+        if handle is not None:
+            _stop_profiler(handle)
+            stem = os.path.join(session.directory, f"{safe_filename(label)}_{stage}")
+            try:
+                entry["profiles"] = _dump_profile(handle, stem)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not write profile for {label}/{stage}: {e}")
+        session.record(entry)
@@ -0,0 +1,139 @@
+"""
+Light TEI document model shared by the section and methods extractors.
+
+Two producers build the same `TeiDocument`:
+- `iterparse_tei`   streams the GROBID bytes with `etree.iterparse`, keeps
+                    only `titleStmt`, `abstract` and `body//div` subtrees
+                    and clears everything else (references, header) as it
+                    goes, so large documents never hold a full tree.
+- `tei_from_tree`   the classic `etree.fromstring` + XPath path.
+
+`TEI_PARSE_MODE=tree` switches `load_tei` back to the full-tree parser.
+"""
+
+import io
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+from lxml import etree
+
+from app.models import NS
+from app.utils.tei_helpers import _clean, _div_heading, _div_type_hint_okay
+
+TEI_PARSE_MODE = os.getenv("TEI_PARSE_MODE", "stream")
+
+_TEI = "{%s}" % NS["tei"]
+_BODY = _TEI + "body"
+_DIV = _TEI + "div"
+_ABSTRACT = _TEI + "abstract"
+_TITLE_STMT = _TEI + "titleStmt"
+_TITLE = _TEI + "title"
+
+
+@dataclass
+class TeiDiv:
+    heading: Optional[str]
+    paragraphs: List[str]
+    type_hint_ok: bool
+
+
+@dataclass
+class TeiDocument:
+    title: str = ""
+    abstract: List[str] = field(default_factory=list)
+    divs: List[TeiDiv] = field(default_factory=list)
+    # per-document heading-match results, keyed by section registry
+    match_cache: Dict[Any, Any] = field(default_factory=dict, repr=False, compare=False)
+
+
+def _paragraphs(el: Any) -> List[str]:
+    out = []
+    for p in el.xpath(".//tei:p", namespaces=NS):
+        t = _clean("".join(p.itertext()))
+        if t:
+            out.append(t)
+    return out
+
+
+def _tei_div(div: Any) -> TeiDiv:
+    return TeiDiv(_div_heading(div), _paragraphs(div), _div_type_hint_okay(div))
+
+
+def tei_from_tree(tree: Any) -> TeiDocument:
+    """Build a TeiDocument from an already parsed TEI tree."""
+    return TeiDocument(
+        title=_clean(tree.xpath("string(.//tei:titleStmt/tei:title)", namespaces=NS)),
+        abstract=[
+            t
+            for abstract in tree.xpath(".//tei:abstract", namespaces=NS)
+            for t in _paragraphs(abstract)
+        ],
+        divs=[_tei_div(d) for d in tree.xpath(".//tei:body//tei:div", namespaces=NS)],
+    )
+
+
+def iterparse_tei(xml: Union[bytes, str]) -> TeiDocument:
+    """
+    Single streaming pass over TEI bytes.
+    Raises `etree.XMLSyntaxError` on malformed input.
+    """
+    data = xml.encode() if isinstance(xml, str) else xml
+    doc = TeiDocument()
+    title: Optional[str] = None
+
+    in_body = 0
+    keep = 0                       # open subtrees we still need
+    div_slots: List[int] = []      # open body divs → slot in document order
+    divs: List[Optional[TeiDiv]] = []
+
+    for event, el in etree.iterparse(io.BytesIO(data), events=("start", "end"), huge_tree=True):
+        tag = el.tag
+        if event == "start":
+            if tag == _BODY:
+                in_body += 1
+            elif tag == _DIV and in_body:
+                div_slots.append(len(divs))
+                divs.append(None)
+                keep += 1
+            elif tag in (_ABSTRACT, _TITLE_STMT):
+                keep += 1
+            continue
+
+        if tag == _DIV and div_slots:
+            # nested divs end first; slots keep XPath document order
+            divs[div_slots.pop()] = _tei_div(el)
+            keep -= 1
+        elif tag == _ABSTRACT:
+            doc.abstract.extend(_paragraphs(el))
+            keep -= 1
+        elif tag == _TITLE_STMT:
+            first = el.find(_TITLE)
+            if title is None and first is not None:
+                title = _clean("".join(first.itertext()))
+            keep -= 1
+        elif tag == _BODY:
+            in_body -= 1
+
+        if keep:
+            continue  # an enclosing subtree still needs this node
+        el.clear()
+        parent = el.getparent()
+        if parent is not None:
+            while el.getprevious() is not None:
+                del parent[0]
+
+    doc.title = title or ""
+    doc.divs = [d for d in divs if d is not None]
+    return doc
+
+
+def load_tei(xml: Union[bytes, str], mode: str = TEI_PARSE_MODE) -> Optional[TeiDocument]:
+    """Parse TEI into a TeiDocument; None if it is not well-formed XML."""
+    try:
+        if mode == "tree":
+            data = xml.encode() if isinstance(xml, str) else xml
+            return tei_from_tree(etree.fromstring(data))
+        return iterparse_tei(xml)
+    except Exception:
+        return None
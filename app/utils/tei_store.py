@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Literal, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+TEI_DIR = os.path.join(os.path.dirname(__file__), "..", "outputs", "tei")
+# Blobs not stored (or re-stored) for this many days are deleted; 0 keeps them forever
+TEI_RETENTION_DAYS = float(os.getenv("TEI_RETENTION_DAYS", "0"))
+TEI_PRUNE_INTERVAL = 3600  # seconds between retention sweeps
+
+# How a route returns the GROBID TEI alongside its results:
+#   full → embed the XML string, ref → content-hash reference, none → drop it
+TeiMode = Literal["full", "ref", "none"]
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+def _tei_path(tei_hash: str) -> str:
+    return os.path.join(TEI_DIR, f"{tei_hash}.xml")
+
+def put_tei(xml: Union[str, bytes]) -> str:
+    """Store a TEI blob under its sha256 and return the hash (idempotent)."""
+    data = xml.encode("utf-8") if isinstance(xml, str) else xml
+    tei_hash = hashlib.sha256(data).hexdigest()
+    path = _tei_path(tei_hash)
+    try:
+        os.utime(path)  # already stored: keep it alive under TEI_RETENTION_DAYS
+    except FileNotFoundError:
+        os.makedirs(TEI_DIR, exist_ok=True)
+        # unique temp file per writer: concurrent workers may store the same TEI
+        fd, tmp_path = tempfile.mkstemp(dir=TEI_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    _maybe_prune()
+    return tei_hash
+
+def prune_tei(max_age_days: float = TEI_RETENTION_DAYS) -> int:
+    """Delete stored TEI (and stray temp files) older than `max_age_days`; returns files removed."""
+    if max_age_days <= 0 or not os.path.isdir(TEI_DIR):
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    with os.scandir(TEI_DIR) as it:
+        for entry in it:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except OSError:
+                continue  # raced with another writer / reader
+    if removed:
+        logger.info(f"🧹 Pruned {removed} TEI file(s) older than {max_age_days:g} day(s)")
+    return removed
+
+def _maybe_prune() -> None:
+    global _last_prune
+    if TEI_RETENTION_DAYS <= 0:
+        return
+    with _prune_lock:
+        now = time.monotonic()
+        if _last_prune and now - _last_prune < TEI_PRUNE_INTERVAL:
+            return
+        _last_prune = now
+    prune_tei(TEI_RETENTION_DAYS)
+
+def get_tei(tei_hash: str) -> Optional[bytes]:
+    """Return the stored TEI bytes, or None for unknown/malformed hashes."""
+    if not _HASH_RE.match(tei_hash):
+        return None
+    try:
+        with open(_tei_path(tei_hash), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def tei_fields(xml: Union[str, bytes], mode: TeiMode = "full") -> Dict[str, Any]:
+    """Response fields carrying the TEI for the requested mode."""
+    if mode == "none":
+        return {}
+    if mode == "ref":
+        tei_hash = put_tei(xml)
+        return {"tei_ref": {"sha256": tei_hash, "url": f"/tei/{tei_hash}"}}
+    return {"tei_xml": xml.decode("utf-8") if isinstance(xml, bytes) else xml}
+
+async def tei_fields_async(xml: Union[str, bytes], mode: TeiMode = "full") -> Dict[str, Any]:
+    """`tei_fields` for coroutines: storing a `ref` (hash, write, rename) runs in a worker thread."""
+    if mode == "ref":
+        return await asyncio.to_thread(tei_fields, xml, mode)
+    return tei_fields(xml, mode)
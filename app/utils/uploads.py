@@ -0,0 +1,264 @@
+"""
+app/utils/uploads.py
+--------------------
+Streaming PDF upload handling.
+
+Multipart bodies are parsed straight off the ASGI stream. Each file part is
+written into a `SpooledPDF`: kept in memory up to UPLOAD_SPOOL_BYTES, then
+rolled over to a named temp file. The sha256 is computed while streaming,
+and a part over UPLOAD_MAX_BYTES aborts the request with 413 before the rest
+of the body is read. The same buffer is handed to GROBID, LLMSherpa and the
+table pipeline, which read it as bytes (in memory) or by path (on disk).
+"""
+
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Union
+
+from fastapi import HTTPException, Request
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ImportError:  # older python-multipart releases
+    import multipart
+    from multipart.multipart import parse_options_header
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(200 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(2 * 1024 * 1024 * 1024)))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(8 * 1024 * 1024)))
+UPLOAD_FIELD = "files"
+_CHUNK = 1024 * 1024
+
+# Keeps the multipart `files` field in the generated OpenAPI docs
+PDF_UPLOAD_OPENAPI: Dict[str, Any] = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": [UPLOAD_FIELD],
+                    "properties": {
+                        UPLOAD_FIELD: {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                        }
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class SpooledPDF:
+    """
+    Write-once PDF buffer: memory up to `spool_bytes`, then a temp file.
+    Exactly one of `data` / `path` is set once `seal()` has been called.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = UPLOAD_MAX_BYTES, spool_bytes: int = UPLOAD_SPOOL_BYTES):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.spool_bytes = spool_bytes
+        self.size = 0
+        self.data: Optional[bytes] = None
+        self.path: Optional[str] = None
+        self._hasher = hashlib.sha256()
+        self._chunks: List[bytes] = []
+        self._disk: Optional[BinaryIO] = None
+        self._owns_path = False
+        self._sha256: Optional[str] = None
+
+    @classmethod
+    def from_path(cls, path: str, filename: Optional[str] = None) -> "SpooledPDF":
+        """Reference an existing file on disk (hashed in chunks, never copied)."""
+        buf = cls(filename or os.path.basename(path), max_bytes=0, spool_bytes=0)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                buf._hasher.update(chunk)
+                buf.size += len(chunk)
+        buf.path = path
+        buf._sha256 = buf._hasher.hexdigest()
+        return buf
+
+    # ── writing ───────────────────────────────────────────────────────
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(f"{self.filename} exceeds {self.max_bytes} bytes")
+        self._hasher.update(chunk)
+        if self._disk is not None:
+            self._disk.write(chunk)
+            return
+        self._chunks.append(chunk)
+        if self.size > self.spool_bytes:
+            self._disk = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+            self._owns_path = True
+            for c in self._chunks:
+                self._disk.write(c)
+            self._chunks = []
+
+    def seal(self) -> None:
+        """Finish writing; in-memory parts are joined into a single bytes object."""
+        if self._sha256 is not None:
+            return
+        self._sha256 = self._hasher.hexdigest()
+        if self._disk is not None:
+            self._disk.close()
+            self.path = self._disk.name
+            self._disk = None
+        else:
+            self.data = b"".join(self._chunks)
+            self._chunks = []
+
+    # ── reading ───────────────────────────────────────────────────────
+    @property
+    def sha256(self) -> str:
+        self.seal()
+        return self._sha256
+
+    def read_bytes(self) -> bytes:
+        """Whole PDF as bytes (reads from disk when spooled)."""
+        self.seal()
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self.path = self._disk.name
+            self._disk = None
+        if self._owns_path and self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+        self.data = None
+        self._chunks = []
+
+    def __enter__(self) -> "SpooledPDF":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# A PDF handed to GROBID / LLMSherpa / the table pipeline
+PdfSource = Union[bytes, SpooledPDF]
+
+
+def pdf_sha256(pdf: PdfSource) -> str:
+    if isinstance(pdf, SpooledPDF):
+        return pdf.sha256
+    return hashlib.sha256(pdf).hexdigest()
+
+
+@contextmanager
+def pdf_upload_part(pdf: PdfSource) -> Iterator[Union[bytes, BinaryIO]]:
+    """Body for an httpx multipart file field: bytes, or a fresh file handle."""
+    if isinstance(pdf, SpooledPDF):
+        pdf.seal()
+        if pdf.data is not None:
+            yield pdf.data
+        else:
+            with open(pdf.path, "rb") as f:
+                yield f
+    else:
+        yield pdf
+
+
+# ---------------------------------------------------------------------
+# Multipart streaming
+# ---------------------------------------------------------------------
+async def iter_pdf_uploads(request: Request, field: str = UPLOAD_FIELD) -> AsyncIterator[SpooledPDF]:
+    """
+    Yield one sealed SpooledPDF per uploaded file as soon as its part ends.
+    The caller owns (and must close) each yielded buffer.
+    """
+    content_type = request.headers.get("content-type", "")
+    ctype, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if ctype != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data upload")
+
+    content_length = request.headers.get("content-length")
+    if content_length and int(content_length) > UPLOAD_MAX_REQUEST_BYTES:
+        raise HTTPException(status_code=413, detail="Request body too large")
+
+    ready: List[SpooledPDF] = []
+    state: Dict[str, Any] = {"buf": None, "headers": {}, "field": b"", "value": b""}
+
+    def on_part_begin() -> None:
+        state["headers"] = {}
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        state["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        state["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"] = state["value"] = b""
+
+    def on_headers_finished() -> None:
+        _, opts = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = opts.get(b"name", b"").decode("latin-1")
+        filename = opts.get(b"filename")
+        if name == field and filename is not None:
+            state["buf"] = SpooledPDF(filename.decode("utf-8", "replace"))
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if state["buf"] is not None:
+            state["buf"].write(data[start:end])
+
+    def on_part_end() -> None:
+        buf = state["buf"]
+        if buf is not None:
+            buf.seal()
+            ready.append(buf)
+            state["buf"] = None
+
+    parser = multipart.MultipartParser(
+        boundary,
+        {
+            "on_part_begin": on_part_begin,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+        },
+    )
+
+    received = 0
+    found = False
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > UPLOAD_MAX_REQUEST_BYTES:
+                raise HTTPException(status_code=413, detail="Request body too large")
+            try:
+                parser.write(chunk)
+            except UploadTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            while ready:
+                found = True
+                yield ready.pop(0)
+        parser.finalize()
+    finally:
+        if state["buf"] is not None:
+            state["buf"].close()
+        for buf in ready:
+            buf.close()
+
+    if not found:
+        raise HTTPException(status_code=400, detail=f"No files uploaded in field '{field}'")
@@ -0,0 +1,34 @@
+import random
+
+HEADINGS = [
+    "1. Introduction", "Background", "2. Materials and Methods", "Methods",
+    "Protein purification", "Cell culture", "Western blot", "Statistical analysis",
+    "3. Results", "Results and discussion", "Findings", "Discussion", "Conclusion",
+    "Conclusions", "Data availability", "Acknowledgements", "Study design",
+    "Experimental section", "Overview", None, "4.2 Sequencing", "Materials",
+]
+
+
+def tei(abstract: str, body: str, back: str = "") -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<TEI xmlns="http://www.tei-c.org/ns/1.0"><teiHeader><fileDesc><titleStmt>'
+        '<title level="a" type="main">A <hi>Big</hi> Title</title></titleStmt></fileDesc>'
+        f"<profileDesc><abstract>{abstract}</abstract></profileDesc></teiHeader>"
+        f"<text><body>{body}</body><back>{back}</back></text></TEI>"
+    )
+
+
+def random_tei(rng: random.Random, n: int) -> str:
+    """A TEI with random headings, optional div types, nesting and references."""
+    divs = []
+    for i, h in enumerate(rng.choices(HEADINGS, k=rng.randint(1, 10))):
+        attr = ' type="materials"' if rng.random() < 0.1 else ""
+        head = f"<head>{h}</head>" if h else ""
+        inner = ""
+        if rng.random() < 0.2:
+            inner = f"<div><head>Nested {i}</head><p>nested <ref>ref</ref> {n}-{i}</p></div>"
+        divs.append(f"<div{attr}>{head}<p>p{n}-{i}  text</p><p> </p>{inner}</div>")
+    abstract = "" if rng.random() < 0.5 else "<div><p>Abs <ref>one</ref> tail.</p></div>"
+    back = "".join(f"<listBibl><biblStruct><title>Ref {k}</title></biblStruct></listBibl>" for k in range(3))
+    return tei(abstract, "".join(divs), back)
@@ -0,0 +1,133 @@
+"""
+Chunk packing against a stub WordPiece tokenizer: words are split into
+4-character pieces that abut each other, punctuation is its own token.
+"""
+import asyncio
+import re
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from app.extractors import chunker
+from app.extractors.chunker import check_chunk_params, chunk_sections
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+
+def stub_offsets(text):
+    offsets = []
+    for m in _WORD.finditer(text):
+        start, end = m.span()
+        offsets.extend((k, min(k + 4, end)) for k in range(start, end, 4))
+    return offsets
+
+
+def stub_tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True):
+    offsets = [stub_offsets(t) for t in texts]
+    return {"input_ids": [list(range(len(o))) for o in offsets], "offset_mapping": offsets}
+
+
+@pytest.fixture(autouse=True)
+def stub_model(monkeypatch):
+    monkeypatch.setattr(chunker, "MODEL", SimpleNamespace(tokenizer=stub_tokenizer, max_seq_length=256))
+
+
+def methods(**content):
+    return {"methods": {"heading": "Methods", "similarity_score": 1.0, "content": content}}
+
+
+SENTENCES = ["Ab cd ef.", "Gh ij kl.", "Mn op qr.", "St uv wx."]   # 4 tokens each
+
+
+def test_overlap_carries_whole_sentences_then_a_word_aligned_tail():
+    chunks = chunk_sections(methods(A=[" ".join(SENTENCES)]), max_tokens=10, overlap=4)
+    assert [c["text"] for c in chunks] == [
+        "Ab cd ef. Gh ij kl.", "Gh ij kl. Mn op qr.", "Mn op qr. St uv wx.",
+    ]
+
+    # budget 6 = one sentence + "ef." from the one before
+    chunks = chunk_sections(methods(A=[" ".join(SENTENCES)]), max_tokens=10, overlap=6)
+    assert [c["text"] for c in chunks] == [
+        "Ab cd ef. Gh ij kl.", "ef. Gh ij kl. Mn op qr.", "kl. Mn op qr. St uv wx.",
+    ]
+    assert [c["n_tokens"] for c in chunks] == [8, 10, 10]
+
+    # budget 5 would start on "." (a continuation): the partial tail is dropped
+    chunks = chunk_sections(methods(A=[" ".join(SENTENCES)]), max_tokens=10, overlap=5)
+    assert chunks[1]["text"] == "Gh ij kl. Mn op qr."
+
+
+def test_overlap_is_capped_by_the_incoming_sentence():
+    long_sentence = "Incubated cells were washed twice with cold buffer."   # 15 tokens
+    text = "Ab cd ef. " + long_sentence
+    # 17 - 15 leaves room for two carried tokens
+    chunks = chunk_sections(methods(A=[text]), max_tokens=17, overlap=6)
+    assert [c["text"] for c in chunks] == ["Ab cd ef.", "ef. " + long_sentence]
+    # one token would be "." alone, a word continuation: nothing is carried
+    chunks = chunk_sections(methods(A=[text]), max_tokens=16, overlap=6)
+    assert [c["text"] for c in chunks] == ["Ab cd ef.", long_sentence]
+
+
+def test_long_sentence_pieces_overlap_and_keep_words_whole():
+    sentence = (
+        "Cells were incubated overnight with buffer and then centrifuged "
+        "at speed before analysis of the supernatant."
+    )
+    n = len(stub_offsets(sentence))
+    chunks = chunk_sections(methods(A=[sentence]), max_tokens=10, overlap=3)
+
+    assert len(chunks) > 2
+    spans = []
+    for c in chunks:
+        assert c["n_tokens"] <= 10
+        # one contiguous slice of the sentence, cut at word boundaries
+        start = sentence.index(c["text"])
+        end = start + len(c["text"])
+        assert start == 0 or sentence[start - 1] == " "
+        assert end == len(sentence) or not sentence[end].isalnum()
+        spans.append((start, end))
+
+    assert spans[0][0] == 0 and spans[-1][1] == len(sentence)
+    for (_, prev_end), (start, _) in zip(spans, spans[1:]):
+        assert start < prev_end   # consecutive pieces overlap
+    assert sum(c["n_tokens"] for c in chunks) > n
+
+
+def test_chunks_never_cross_a_subheading():
+    sections = methods(A=["Ab cd ef. Gh ij kl."], B=["Mn op qr. St uv wx."])
+    sections["abstract"] = {"heading": "Abstract", "content": ["Yz ab cd."]}
+    chunks = chunk_sections(sections, max_tokens=6, overlap=2)
+
+    by_group = {}
+    for c in chunks:
+        by_group.setdefault((c["section"], c["subheading"]), []).append(c["text"])
+    assert by_group == {
+        ("abstract", "Abstract"): ["Yz ab cd."],
+        ("methods", "A"): ["Ab cd ef.", "ef. Gh ij kl."],
+        ("methods", "B"): ["Mn op qr.", "qr. St uv wx."],
+    }
+    assert [c["chunk_id"] for c in chunks] == list(range(len(chunks)))
+
+
+def test_chunk_params():
+    check_chunk_params(254, 0)
+    for max_tokens, overlap in [(10, 10), (10, 11), (0, 0), (10, -1), (255, 0)]:
+        with pytest.raises(ValueError):
+            check_chunk_params(max_tokens, overlap)
+    with pytest.raises(ValueError):
+        chunk_sections(methods(A=["Ab cd ef."]), max_tokens=300, overlap=0)
+
+
+@pytest.mark.parametrize("max_tokens,overlap", [(40, 40), (255, 40)])
+def test_route_rejects_bad_budget_with_422(max_tokens, overlap):
+    pytest.importorskip("fitz")
+    pytest.importorskip("docling")
+    from fastapi import HTTPException
+
+    from app.routes.chunk import chunk_pdfs
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(chunk_pdfs(None, max_tokens=max_tokens, overlap=overlap, embeddings="none"))
+    assert exc.value.status_code == 422
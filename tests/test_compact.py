@@ -0,0 +1,35 @@
+import random
+
+from app.utils.compact import DocumentResult, _synthetic_result
+
+
+def test_round_trip_preserves_ragged_rows_and_nulls():
+    sections = {
+        "title": {"heading": "title", "content": ""},
+        "abstract": {"heading": "abstract", "content": []},
+        "methods": {"heading": "Methods", "similarity_score": 1.0, "content": {"α-synuclein": ["µM", "b"], "c": []}},
+        "results_discussion": {"heading": "R", "subsections": [{"subheading": None, "content": ["z"]}]},
+    }
+    tables = [
+        {"table_index": 1, "caption": None, "rows": [["a", "b"], ["c"], [], [None, "", None]], "footnotes": ["f"]},
+        {"table_index": 2, "caption": "c", "rows": [], "footnotes": []},
+    ]
+    result = DocumentResult.build("a.pdf", sections, tables, {"tei_ref": {"sha256": "x", "url": "/tei/x"}})
+    assert result.to_dict() == {
+        "filename": "a.pdf",
+        "tei_ref": {"sha256": "x", "url": "/tei/x"},
+        "extracted_sections": sections,
+        "tables": tables,
+    }
+
+
+def test_raw_tei_is_decoded_at_the_boundary():
+    result = DocumentResult.build("a.pdf", {}, [], {}, "<TEI>α</TEI>".encode())
+    assert result.to_dict()["tei_xml"] == "<TEI>α</TEI>"
+
+
+def test_synthetic_documents_round_trip():
+    for i in range(20):
+        r = _synthetic_result(i, random.Random(i))
+        packed = DocumentResult.build(r["filename"], r["extracted_sections"], r["tables"], {})
+        assert packed.to_dict() == r
@@ -0,0 +1,166 @@
+"""
+The registry-based extractors against the original per-heading walkers
+(kept below as references), over randomized TEI documents.
+"""
+import random
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pytest
+
+pytest.importorskip("lxml")
+pytest.importorskip("sentence_transformers")
+
+from lxml import etree
+
+from app.models import (
+    ABSTRACT_ALTERNATES,
+    ANCHORS,
+    DISCUSSION_STOPWORDS,
+    METHOD_KEYWORDS,
+    NS,
+    RESULTS_DISCUSSION_ANCHORS,
+    RESULTS_STOPWORDS,
+    STOPWORDS,
+)
+from app.extractors.methods_extractor import extract_methods_with_subsections
+from app.extractors.section_extractor import extract_structured_sections
+from app.extractors.section_registry import CORE_REGISTRY, REGISTRY, extract_registered_sections
+from app.utils.tei_helpers import _clean, _div_heading, _div_type_hint_okay
+from app.utils.tei_parser import load_tei
+
+from tei_samples import random_tei
+
+_LEADING_NUM_RE = re.compile(r"^\s*\d+(?:\.\d+)*[\.\)\:]?\s*")
+
+
+# ─── Reference walkers (one embedding call per heading) ──────────────────
+def _match(vec, heading, anchors, threshold=0.5, token_level=False) -> bool:
+    anchor_vecs = np.array([vec(a) for a in sorted(anchors)])
+    texts = [t.lower() for t in re.findall(r"[A-Za-z]+", heading)] if token_level else [heading]
+    return any((anchor_vecs @ vec(t)).max() >= threshold for t in texts)
+
+
+def _paras(el) -> List[str]:
+    return [t for t in (_clean("".join(p.itertext())) for p in el.xpath(".//tei:p", namespaces=NS)) if t]
+
+
+def ref_methods(vec, xml: str, sim_threshold=0.65, fallback_threshold=0.5) -> Tuple:
+    try:
+        tree = etree.fromstring(xml.encode())
+    except Exception:
+        return {}, 0.0, None, -1
+    divs = tree.xpath(".//tei:body//tei:div", namespaces=NS)
+    if not divs:
+        return {}, 0.0, None, -1
+
+    result: Dict[str, List[str]] = {}
+    start_head, start_score, start_idx = None, 0.0, None
+    for i, d in enumerate(divs):
+        h = _div_heading(d)
+        if h and _match(vec, h, ANCHORS, sim_threshold):
+            start_head, start_score, start_idx = h, 1.0, i
+            break
+
+    capturing, current = False, None
+    if start_idx is not None:
+        for d in divs[start_idx:]:
+            h = _div_heading(d)
+            if h and any(sw in h.lower() for sw in STOPWORDS):
+                break
+            if h:
+                current = h
+                result[current] = []
+            for t in _paras(d):
+                result.setdefault(current or "untitled", []).append(t)
+    else:
+        for d in divs:
+            h = _div_heading(d)
+            if not h and not _div_type_hint_okay(d):
+                continue
+            if h and any(sw in h.lower() for sw in STOPWORDS):
+                if capturing:
+                    break
+                continue
+            if _div_type_hint_okay(d) or (h and _match(vec, h, METHOD_KEYWORDS, fallback_threshold, True)):
+                if not capturing:
+                    capturing = True
+                    if h and not start_head:
+                        start_head = h
+                if h:
+                    current = h
+            if capturing:
+                for t in _paras(d):
+                    result.setdefault(current or "untitled", []).append(t)
+        if not start_head:
+            return {}, 0.0, None, -1
+    return result, start_score, start_head, start_idx or -1
+
+
+def ref_sections(vec, xml: str) -> Dict[str, Any]:
+    try:
+        tree = etree.fromstring(xml.encode())
+    except Exception:
+        return {}
+    divs = tree.xpath(".//tei:body//tei:div", namespaces=NS)
+    norm = lambda raw: _LEADING_NUM_RE.sub("", raw).strip() if raw else ""
+
+    title = _clean(tree.xpath("string(.//tei:titleStmt/tei:title)", namespaces=NS))
+    abstract = [t for a in tree.xpath(".//tei:abstract", namespaces=NS) for t in _paras(a)]
+    abstract_heading = "abstract"
+    if not abstract:
+        for d in divs:
+            raw = _div_heading(d)
+            if norm(raw) and _match(vec, norm(raw), ABSTRACT_ALTERNATES):
+                abstract, abstract_heading = _paras(d), raw
+                break
+
+    capturing, main_heading = False, None
+    subsections: List[Dict[str, Any]] = []
+    current: Dict[str, Any] = {"subheading": None, "content": []}
+    for d in divs:
+        raw = _div_heading(d)
+        h = norm(raw)
+        if h and not capturing and _match(vec, h, RESULTS_DISCUSSION_ANCHORS, 0.8):
+            capturing, main_heading = True, raw
+            current = {"subheading": raw, "content": []}
+        if capturing:
+            if h and _match(vec, h, RESULTS_STOPWORDS | DISCUSSION_STOPWORDS, 0.8, True):
+                break
+            if raw:
+                if current["content"]:
+                    subsections.append(current)
+                current = {"subheading": raw, "content": []}
+            current["content"].extend(_paras(d))
+    if capturing and current["content"]:
+        subsections.append(current)
+
+    return {
+        "title": {"heading": "title", "content": title},
+        "abstract": {"heading": abstract_heading, "content": abstract},
+        "results_discussion": {"heading": main_heading or "results_and_discussion", "subsections": subsections},
+    }
+
+
+# ─── Equivalence ─────────────────────────────────────────────────────────
+@pytest.mark.parametrize("seed", range(300))
+def test_registry_extractors_match_reference(trigram_model, seed):
+    xml = random_tei(random.Random(seed), seed)
+    doc = load_tei(xml)
+
+    assert extract_methods_with_subsections(doc) == ref_methods(trigram_model, xml)
+    assert extract_structured_sections(doc) == ref_sections(trigram_model, xml)
+    assert extract_methods_with_subsections(xml, 0.5, 0.4) == ref_methods(trigram_model, xml, 0.5, 0.4)
+
+
+def test_extractors_share_one_core_pass(trigram_model):
+    doc = load_tei(random_tei(random.Random(7), 7))
+    extract_methods_with_subsections(doc)
+    extract_structured_sections(doc)
+    assert list(doc.match_cache) == [CORE_REGISTRY]
+
+
+def test_registered_sections_cover_registry(trigram_model):
+    doc = load_tei(random_tei(random.Random(3), 3))
+    assert set(extract_registered_sections(doc)) == {spec.name for spec in REGISTRY}
@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+pytest.importorskip("lxml")
+pytest.importorskip("sentence_transformers")  # app.models, via tei_parser
+
+from lxml import etree
+
+from app.utils.tei_parser import iterparse_tei, load_tei, tei_from_tree
+
+from tei_samples import random_tei, tei
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_iterparse_matches_tree(seed):
+    xml = random_tei(random.Random(seed), seed)
+    assert iterparse_tei(xml.encode()) == tei_from_tree(etree.fromstring(xml.encode()))
+
+
+def test_nested_divs_keep_document_order():
+    xml = tei("", "<div><head>A</head><p>a</p><div><head>B</head><p>b</p></div></div><div><head>C</head><p>c</p></div>")
+    doc = iterparse_tei(xml)
+    assert [d.heading for d in doc.divs] == ["A", "B", "C"]
+    assert doc.divs[0].paragraphs == ["a", "b"]
+    assert doc.title == "A Big Title"
+
+
+@pytest.mark.parametrize("mode", ["stream", "tree"])
+def test_malformed_tei_is_none(mode):
+    assert load_tei(b"<TEI><broken", mode) is None